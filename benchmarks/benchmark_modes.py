@@ -0,0 +1,101 @@
+"""Headless throughput benchmark for the assistant modes.
+
+Runs one or more modes over a recorded or synthetic frame source with
+speech muted and reports frames per second as a JSON line, so results can
+be compared between releases:
+
+    python benchmarks/benchmark_modes.py --mode nav --source synthetic:640x480:200
+    python benchmarks/benchmark_modes.py --mode all --source recordings/street.mp4
+
+Drawing and the window run as in the app: frames are annotated on the mode
+thread and shown by the display thread at its capped rate. Pass --headless
+to skip drawing and windows as headless units do, or --compare-headless to
+run each mode both ways and report the FPS gained by headless operation:
+
+    python benchmarks/benchmark_modes.py --mode nav --compare-headless
+
+Runs with a window need a display; on CI machines run the script under a
+virtual framebuffer (e.g. xvfb-run) or use --headless. Without a display,
+modes run headless automatically (see ASSISTANT_HEADLESS).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.display import display
+from src.utils.frame_sources import open_frame_source
+
+MODES = {
+    "nav": ("src.modes.navigation", "run_navigation_mode"),
+    "cap": ("src.modes.captioning", "run_captioning_mode"),
+    "sign": ("src.modes.sign_detection", "run_sign_detection_mode"),
+    "curr": ("src.modes.currency_detection", "run_currency_detection_mode"),
+}
+
+def silent_speak(text, *args, **kwargs):
+    """Speech callback that discards announcements"""
+
+def benchmark_mode(mode, source_spec, realtime=False, headless=None):
+    """Run a mode until the source is exhausted and return its timings
+
+    headless=None keeps the display's own setting (ASSISTANT_HEADLESS).
+    """
+    display.configure(headless=headless)
+    module_name, func_name = MODES[mode]
+    module = __import__(module_name, fromlist=[func_name])
+    run_mode = getattr(module, func_name)
+
+    source = open_frame_source(source_spec, realtime=realtime)
+    start = time.perf_counter()
+    run_mode(silent_speak, False, source)
+    elapsed = time.perf_counter() - start
+    source.release()
+
+    frames = getattr(source, "frames_read", 0)
+    return {
+        "mode": mode,
+        "source": source_spec,
+        "frames": frames,
+        "seconds": round(elapsed, 3),
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        "headless": display.headless,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", default="all", choices=["all"] + list(MODES))
+    parser.add_argument("--source", default="synthetic:640x480:200",
+                        help="Video file, image directory or synthetic[:WxH[:FRAMES]]")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Pace frames at the source frame rate instead of as fast as possible")
+    parser.add_argument("--headless", action="store_true", help="Skip drawing and windows")
+    parser.add_argument("--compare-headless", action="store_true",
+                        help="Run each mode with and without drawing and report the FPS gained headless")
+    parser.add_argument("--output", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    modes = list(MODES) if args.mode == "all" else [args.mode]
+    for mode in modes:
+        if args.compare_headless:
+            windowed = benchmark_mode(mode, args.source, args.realtime, headless=False)
+            result = benchmark_mode(mode, args.source, args.realtime, headless=True)
+            result["windowed_fps"] = windowed["fps"]
+            result["headless_fps_gain"] = round(result["fps"] - windowed["fps"], 2)
+        else:
+            result = benchmark_mode(mode, args.source, args.realtime, True if args.headless else None)
+        result["python"] = platform.python_version()
+        result["machine"] = platform.machine()
+        line = json.dumps(result)
+        print(line)
+        if args.output:
+            with open(args.output, "a") as f:
+                f.write(line + "\n")
+    display.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Caption latency of the BLIP profiles.
+
+Captions the same frames with each profile and reports mean/p95 latency,
+so the CPU profile (INT8 linear layers, inference mode, greedy decoding)
+can be compared with the original float32 settings:
+
+    python benchmarks/caption_latency.py --source recordings/rooms --frames 20
+    python benchmarks/caption_latency.py --profiles default cpu --threads 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modes.captioning import CAPTION_PROFILES, describe_scene, load_blip
+from src.utils.frame_sources import open_frame_source
+
+def read_frames(spec, count):
+    source = open_frame_source(spec, realtime=False)
+    frames = []
+    while len(frames) < count:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(CAPTION_PROFILES), choices=list(CAPTION_PROFILES))
+    parser.add_argument("--source", default="synthetic:640x480")
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--threads", type=int, help="Override the CPU profile's thread count")
+    parser.add_argument("--max-new-tokens", type=int, help="Override the CPU profile's decode length")
+    args = parser.parse_args()
+
+    if args.threads:
+        CAPTION_PROFILES["cpu"]["threads"] = args.threads
+    if args.max_new_tokens:
+        CAPTION_PROFILES["cpu"]["decode"]["max_new_tokens"] = args.max_new_tokens
+
+    frames = read_frames(args.source, args.frames)
+    for profile in args.profiles:
+        load_start = time.perf_counter()
+        processor, model = load_blip(profile)
+        load_seconds = time.perf_counter() - load_start
+        decode = CAPTION_PROFILES[profile]["decode"]
+        threads = CAPTION_PROFILES[profile]["threads"]
+        describe_scene(frames[0], processor, model, decode=decode, threads=threads)  # warm up
+
+        latencies, captions = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            captions.append(describe_scene(frame, processor, model, decode=decode, threads=threads))
+            latencies.append(time.perf_counter() - start)
+
+        latencies.sort()
+        print(json.dumps({
+            "profile": profile,
+            "frames": len(frames),
+            "load_seconds": round(load_seconds, 2),
+            "mean_ms": round(1000 * sum(latencies) / len(latencies), 1),
+            "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1),
+            "sample_caption": captions[0],
+        }))
+
+if __name__ == "__main__":
+    main()
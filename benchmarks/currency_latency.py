@@ -0,0 +1,65 @@
+"""Per-frame latency of the currency classifier backends.
+
+Compares the original model.predict path with the traced tf.function and
+TFLite fast paths on the same frames, and checks that labels agree with
+model.predict:
+
+    python benchmarks/currency_latency.py --source recordings/notes
+    python benchmarks/currency_latency.py --backends keras function tflite-fp16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modes.currency_detection import CURRENCY_BACKENDS, CurrencyClassifier
+from src.utils.frame_sources import open_frame_source
+
+def read_frames(spec, count):
+    source = open_frame_source(spec, realtime=False)
+    frames = []
+    while len(frames) < count:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(CURRENCY_BACKENDS), choices=CURRENCY_BACKENDS)
+    parser.add_argument("--source", default="synthetic:640x480")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    frames = read_frames(args.source, args.frames)
+    reference = None
+    for backend in args.backends:
+        classifier = CurrencyClassifier(backend=backend)
+        classifier(frames[0])  # warm up (tracing, tensor allocation)
+
+        latencies, labels = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            label, _ = classifier(frame)
+            latencies.append(time.perf_counter() - start)
+            labels.append(label)
+
+        if reference is None:
+            reference = labels
+        latencies.sort()
+        print(json.dumps({
+            "backend": backend,
+            "frames": len(frames),
+            "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+            "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2),
+            "label_agreement_with_first": round(
+                sum(a == b for a, b in zip(reference, labels)) / len(labels), 3),
+        }))
+
+if __name__ == "__main__":
+    main()
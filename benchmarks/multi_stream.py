@@ -0,0 +1,111 @@
+"""Multi-stream inference benchmark for the micro-batching scheduler.
+
+Feeds N synthetic (or recorded) streams through one model and compares
+aggregate throughput with running the same frames one at a time:
+
+    python benchmarks/multi_stream.py --model yolo --streams 4 --batch 4 --wait-ms 10
+    python benchmarks/multi_stream.py --model currency --streams 2 --source recordings/notes
+
+Per-stream latency (mean and p95) and the average batch size are reported
+as one JSON line per run.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.frame_sources import open_frame_source
+from src.utils.inference_scheduler import InferenceScheduler
+
+def register_model(scheduler, name):
+    """Load one model and register its batch function under name"""
+    if name in ("yolo", "midas"):
+        from src.modes.navigation import register_navigation_models
+        register_navigation_models(scheduler)
+    elif name == "signs":
+        from src.modes.sign_detection import register_sign_model
+        register_sign_model(scheduler)
+    elif name == "currency":
+        from src.modes.currency_detection import register_currency_model
+        register_currency_model(scheduler)
+    else:
+        raise ValueError(f"Unknown model: {name}")
+
+def read_frames(spec, count):
+    """Read up to count frames from a frame source into memory"""
+    source = open_frame_source(spec, realtime=False)
+    frames = []
+    while len(frames) < count:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames
+
+def run_serial(batch_fn, streams):
+    """Baseline: every frame of every stream at batch size 1, one after another"""
+    start = time.perf_counter()
+    total = 0
+    for frames in zip(*streams):
+        for frame in frames:
+            batch_fn([frame])
+            total += 1
+    return total, time.perf_counter() - start
+
+def run_scheduled(scheduler, name, streams):
+    """One thread per stream, all sharing the scheduler"""
+    def stream_loop(stream_id, frames):
+        for frame in frames:
+            scheduler.infer(name, frame, stream_id)
+
+    threads = [threading.Thread(target=stream_loop, args=(i, frames)) for i, frames in enumerate(streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(len(frames) for frames in streams), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="yolo", choices=["yolo", "midas", "signs", "currency"])
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=50, help="Frames per stream")
+    parser.add_argument("--batch", type=int, default=4, help="Maximum micro-batch size")
+    parser.add_argument("--wait-ms", type=float, default=10, help="Maximum time to wait for a batch to fill")
+    parser.add_argument("--source", default="synthetic:640x480",
+                        help="Frame source spec used for every stream")
+    args = parser.parse_args()
+
+    streams = [read_frames(args.source, args.frames) for _ in range(args.streams)]
+
+    scheduler = InferenceScheduler(max_batch_size=args.batch, max_wait_ms=args.wait_ms)
+    register_model(scheduler, args.model)
+    batch_fn = scheduler.models[args.model]["batch_fn"]
+
+    # Warm up so model initialization is not timed
+    batch_fn([streams[0][0]])
+
+    serial_frames, serial_seconds = run_serial(batch_fn, streams)
+    scheduled_frames, scheduled_seconds = run_scheduled(scheduler, args.model, streams)
+    stats = scheduler.stats()
+    scheduler.stop()
+
+    print(json.dumps({
+        "model": args.model,
+        "streams": args.streams,
+        "max_batch_size": args.batch,
+        "max_wait_ms": args.wait_ms,
+        "serial_fps": round(serial_frames / serial_seconds, 2),
+        "scheduled_fps": round(scheduled_frames / scheduled_seconds, 2),
+        "avg_batch_size": stats["models"][args.model]["avg_batch_size"],
+        "stream_latency": stats["streams"],
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Microbenchmark of the per-frame UI drawing (controls overlay + status text).
+
+Compares the original full-frame copy/addWeighted/putText drawing with the
+cached ROI-only drawing in src/utils/ui.py, and checks that both produce the
+same pixels:
+
+    python benchmarks/overlay.py
+    python benchmarks/overlay.py --sizes 640x480 1920x1080 --frames 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.ui import add_controls_overlay, draw_status_text
+
+STATUS_TEXT = "Obstacle ahead. Move left."
+
+def legacy_overlay(frame, speech_running=False):
+    """The overlay as it was drawn before caching"""
+    h, w = frame.shape[:2]
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (0, h-70), (w, h), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+    cv2.putText(frame, "Controls: q=exit, n=nav, c=cap, s=sign, m=curr, v=voice",
+                (10, h-45), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    status = "ON" if speech_running else "OFF"
+    cv2.putText(frame, f"Voice commands: {status}", (10, h-20), cv2.FONT_HERSHEY_SIMPLEX,
+                0.5, (0, 255, 0) if speech_running else (0, 0, 255), 1)
+    return frame
+
+def legacy_draw(frame, speech_running):
+    cv2.putText(frame, STATUS_TEXT, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+    return legacy_overlay(frame, speech_running)
+
+def cached_draw(frame, speech_running):
+    draw_status_text(frame, STATUS_TEXT, (10, 30), 0.7, (0, 0, 255), 2)
+    return add_controls_overlay(frame, speech_running)
+
+def time_per_frame(draw, frames, speech_running):
+    work = [frame.copy() for frame in frames]
+    start = time.perf_counter()
+    for frame in work:
+        draw(frame, speech_running)
+    return (time.perf_counter() - start) / len(work)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1280x720"], help="Frame sizes as WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=300, help="Frames drawn per variant")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        width, height = (int(v) for v in size.lower().split("x"))
+        frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(args.frames)]
+
+        max_diff = 0
+        for speech_running in (False, True):
+            expected = legacy_draw(frames[0].copy(), speech_running)
+            actual = cached_draw(frames[0].copy(), speech_running)
+            max_diff = max(max_diff, int(np.abs(expected.astype(np.int16) - actual).max()))
+
+        legacy = time_per_frame(legacy_draw, frames, True)
+        cached = time_per_frame(cached_draw, frames, True)
+        print(json.dumps({
+            "size": f"{width}x{height}",
+            "legacy_us_per_frame": round(legacy * 1e6, 1),
+            "cached_us_per_frame": round(cached * 1e6, 1),
+            "speedup": round(legacy / cached, 2) if cached else None,
+            "max_pixel_diff": max_diff,
+        }))
+
+if __name__ == "__main__":
+    main()
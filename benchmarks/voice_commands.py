@@ -0,0 +1,125 @@
+"""Voice command recognition benchmark over a corpus of WAV recordings.
+
+Feeds each recording through the Vosk pipeline faster than real time and
+reports command accuracy, recognition latency (when the command fired,
+relative to the end of speech in the recording) and CPU time per second of
+audio for each recognizer mode:
+
+    python benchmarks/voice_commands.py --corpus recordings/commands
+    python benchmarks/voice_commands.py --corpus recordings/commands --recognizers grammar
+
+Recordings must be 16 kHz mono 16-bit WAV. The expected command is read
+from --labels (a CSV of file name, command) or else from the file name prefix,
+e.g. nav_003.wav or curr-kitchen.wav; use "none" for recordings that should
+not trigger any command.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.recognition.audio_sources import SAMPLE_RATE, WavFileSource
+from src.recognition.voice_commands import CHUNK_SAMPLES, KeywordSpotter, initialize_vosk
+
+def load_labels(corpus, labels_path=None):
+    """Map each WAV path in the corpus to its expected command (None for no command)"""
+    labels = {}
+    if labels_path:
+        with open(labels_path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and not row[0].startswith("#"):
+                    labels[os.path.basename(row[0].strip())] = row[1].strip()
+
+    expected = {}
+    for path in sorted(glob.glob(os.path.join(corpus, "*.wav"))):
+        name = os.path.basename(path)
+        command = labels.get(name)
+        if command is None:
+            command = name.replace("-", "_").split("_")[0].lower()
+        expected[path] = None if command in ("", "none") else command
+    return expected
+
+def speech_end(path, frame_ms=20, threshold_db=-40):
+    """Time (s) of the last frame whose energy is within threshold_db of the loudest"""
+    with wave.open(path, "rb") as wav:
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).astype(np.float32)
+    size = SAMPLE_RATE * frame_ms // 1000
+    frames = samples[:len(samples) // size * size].reshape(-1, size)
+    if not len(frames):
+        return 0.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-6
+    voiced = np.nonzero(20 * np.log10(rms / rms.max()) > threshold_db)[0]
+    return float((voiced[-1] + 1) * size / SAMPLE_RATE) if len(voiced) else 0.0
+
+def recognize(path, model, recognizer):
+    """Return (first command, audio seconds when it fired, CPU seconds, audio seconds)"""
+    spotter = KeywordSpotter(model, recognizer)
+    chunk = CHUNK_SAMPLES.get(recognizer, 4000)
+    source = WavFileSource(path, realtime=False)
+    command, fired_at = None, None
+
+    cpu_start = time.process_time()
+    while True:
+        data = source.read(chunk)
+        heard, _ = spotter.finish() if not data else spotter.accept(data)
+        if heard and command is None:
+            command, fired_at = heard, source.seconds_read
+        if not data:
+            break
+    cpu = time.process_time() - cpu_start
+    source.close()
+    return command, fired_at, cpu, source.duration
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", required=True, help="Directory of 16 kHz mono WAV recordings")
+    parser.add_argument("--labels", help="CSV of file name, expected command")
+    parser.add_argument("--recognizers", nargs="+", default=list(CHUNK_SAMPLES), choices=list(CHUNK_SAMPLES))
+    parser.add_argument("--verbose", action="store_true", help="Also print one line per recording")
+    args = parser.parse_args()
+
+    expected = load_labels(args.corpus, args.labels)
+    if not expected:
+        sys.exit(f"No .wav files found in {args.corpus}")
+    model = initialize_vosk()
+    if model is None:
+        sys.exit("Vosk model not available")
+    ends = {path: speech_end(path) for path in expected}
+
+    for recognizer in args.recognizers:
+        correct, false_positives, latencies = 0, 0, []
+        cpu_total, audio_total = 0.0, 0.0
+        for path, target in expected.items():
+            command, fired_at, cpu, duration = recognize(path, model, recognizer)
+            cpu_total += cpu
+            audio_total += duration
+            correct += command == target
+            false_positives += target is None and command is not None
+            if command is not None and command == target:
+                latencies.append(fired_at - ends[path])
+            if args.verbose:
+                print(json.dumps({"recognizer": recognizer, "file": os.path.basename(path),
+                                  "expected": target, "heard": command,
+                                  "fired_at_s": fired_at, "speech_end_s": round(ends[path], 3)}))
+
+        latencies.sort()
+        print(json.dumps({
+            "recognizer": recognizer,
+            "files": len(expected),
+            "accuracy": round(correct / len(expected), 3),
+            "false_positives": false_positives,
+            "mean_latency_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else None,
+            "p95_latency_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+            "cpu_per_audio_second": round(cpu_total / audio_total, 4) if audio_total else None,
+        }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""A/B comparison of YOLO inference backends (torch, onnx, onnx-int8).
+
+Runs the same frames through each backend and reports mean/p95 latency and
+how well detections agree with the PyTorch baseline:
+
+    python benchmarks/yolo_backends.py --weights models/yolov8m.pt --source recordings/street.mp4
+    python benchmarks/yolo_backends.py --weights models/best.pt --backends torch onnx-int8
+
+onnx-int8 is calibrated on the frames in models/calibration/ (override with
+--calibration). Use --save-calibration to fill that directory from --source.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.frame_sources import open_frame_source
+from src.utils.helpers import extract_detections
+from src.utils.tracker import iou_matrix
+from src.utils.yolo_backend import BACKENDS, CALIBRATION_DIR, load_yolo, prepare_yolo
+
+def read_frames(spec, count):
+    source = open_frame_source(spec, realtime=False)
+    frames = []
+    while len(frames) < count:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames
+
+def agreement(reference, candidate, iou_threshold=0.5):
+    """Fraction of reference detections matched by a same-class candidate box"""
+    ref_boxes, _, ref_cls = reference
+    cand_boxes, _, cand_cls = candidate
+    if len(ref_boxes) == 0:
+        return 1.0 if len(cand_boxes) == 0 else 0.0
+    if len(cand_boxes) == 0:
+        return 0.0
+    ious = iou_matrix(ref_boxes, cand_boxes)
+    ious[ref_cls[:, None] != cand_cls[None, :]] = 0
+    return float(np.mean(ious.max(axis=1) >= iou_threshold))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weights", default=os.path.join("models", "yolov8m.pt"))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--source", default="synthetic:640x480")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--calibration", default=CALIBRATION_DIR)
+    parser.add_argument("--save-calibration", action="store_true",
+                        help="Write the benchmark frames to the calibration directory first")
+    args = parser.parse_args()
+
+    frames = read_frames(args.source, args.frames)
+    if args.save_calibration:
+        os.makedirs(args.calibration, exist_ok=True)
+        for i, frame in enumerate(frames):
+            cv2.imwrite(os.path.join(args.calibration, f"frame_{i:05d}.jpg"), frame)
+
+    baseline = None
+    for backend in args.backends:
+        model = load_yolo(args.weights, backend, args.calibration)
+        model(frames[0], verbose=False)  # warm up
+
+        latencies, detections = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            results = model(frame, verbose=False)[0]
+            latencies.append(time.perf_counter() - start)
+            detections.append(extract_detections(results, args.conf))
+
+        if baseline is None:
+            baseline = detections
+        latencies.sort()
+        print(json.dumps({
+            "backend": backend,
+            "loaded": prepare_yolo(args.weights, backend, args.calibration)[0],
+            "frames": len(frames),
+            "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+            "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2),
+            "agreement_with_first": round(float(np.mean(
+                [agreement(ref, cand) for ref, cand in zip(baseline, detections)])), 3),
+        }))
+
+if __name__ == "__main__":
+    main()
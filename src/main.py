@@ -1,54 +1,248 @@
+import argparse
+import importlib
+import json
 import os
 import sys
+import threading
 import time
 
+START_TIME = time.time()
+
 # Make sure package is importable (for running from command line)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Import modules
-from src.tts.speech_engine import speak, cleanup_tts, toggle_speech
-from src.recognition.voice_commands import (
-    VOSK_AVAILABLE, start_voice_commands, 
-    stop_voice_commands, toggle_voice_commands, 
-    check_voice_commands
-)
-from src.modes.navigation import run_navigation_mode
-from src.modes.captioning import run_captioning_mode
-from src.modes.sign_detection import run_sign_detection_mode
-from src.modes.currency_detection import run_currency_detection_mode
+# Import only what the menu needs. The modes (and through them ultralytics,
+# torch, TensorFlow and transformers), Vosk and the frame sources are
+# imported when first used, or ahead of time in the background with --preload.
+from src.tts.speech_engine import speak, cleanup_tts, toggle_speech, get_speech_stats, prerender_phrases
+from src.tts.phrase_cache import register_phrases
+from src.utils.model_cache import get_model_cache_stats
+from src.utils.command_bus import command_bus
+from src.utils.display import display
+from src.utils.metrics import metrics, MetricsExporter, METRICS_FILE, METRICS_PORT, METRICS_INTERVAL
+from src.utils.model_preloader import ModelPreloader, path_size
+from src.utils.yolo_backend import BACKENDS, set_yolo_backend
+
+STARTUP_IMPORT_SECONDS = time.time() - START_TIME
 
 # Global state
-speech_running = False
+frame_source = None  # None means the shared live camera
+options = None  # parsed command line options
+preloader = None  # warms the likely next mode's models while the menu waits
+import_times = {}  # module -> seconds taken by its first import
+import_lock = threading.Lock()
+
+# Mode command -> (module, run function, model loader), imported on first use
+MODES = {
+    "nav": ("src.modes.navigation", "run_navigation_mode", "initialize_navigation_models"),
+    "cap": ("src.modes.captioning", "run_captioning_mode", "initialize_captioning_model"),
+    "sign": ("src.modes.sign_detection", "run_sign_detection_mode", "initialize_sign_model"),
+    "curr": ("src.modes.currency_detection", "run_currency_detection_mode", "initialize_currency_model"),
+}
+MODE_COMMANDS = tuple(MODES)
+MENU_COMMANDS = MODE_COMMANDS + ("voice", "speech", "exit")
+
+# Option choices, kept here so --help does not import the modes (and with
+# them TensorFlow and torch). Keep in step with CURRENCY_BACKENDS in
+# currency_detection.py and CAPTION_PROFILES in captioning.py.
+CURRENCY_BACKEND_CHOICES = ("keras", "function", "tflite", "tflite-fp16", "tflite-int8")
+CAPTION_PROFILE_CHOICES = ("auto", "default", "cpu")
+
+# Order used by --preload: the mode modules first (cheap), then the
+# frameworks their models need, most widely used first
+PRELOAD_ORDER = ("src.recognition.voice_commands", "src.modes.navigation",
+                 "src.modes.sign_detection", "src.modes.currency_detection",
+                 "src.modes.captioning", "ultralytics", "transformers", "tensorflow")
+
+# Fixed menu and mode-switch announcements, pre-rendered by the phrase cache
+MENU_PHRASES = (
+    "Welcome to AI Assistant for the Visually Impaired.",
+    "Would you like to enable voice commands?",
+    "Voice commands activated. You can now speak your mode choice.",
+    "Voice command system is not available. Using keyboard input only.",
+    "Using keyboard input for commands.",
+    "Which mode would you like to use? Navigation, Captioning, Sign Detection, Currency Detection, or Voice Command?",
+    "Starting navigation mode.",
+    "Starting captioning mode.",
+    "Starting sign detection mode.",
+    "Starting currency detection mode.",
+    "Speech output enabled",
+    "Voice commands are now active. You can speak commands.",
+    "Voice commands are now inactive.",
+    "Exiting assistant. Goodbye.",
+    "I didn't understand that command. Please try again with nav, cap, sign, curr, voice, or exit.",
+    "Returning to main menu.",
+) + tuple(f"Switching to {mode} mode." for mode in ("nav", "cap", "sign", "curr")) + tuple(
+    f"Already in {mode} mode." for mode in ("nav", "cap", "sign", "curr"))
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="AI Assistant for the Visually Impaired")
+    parser.add_argument("--source", default="camera",
+                        help="Frame source: camera[:index], a video file, an image directory, "
+                             "or synthetic[:WIDTHxHEIGHT[:FRAMES]] (default: camera)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Play file/synthetic sources as fast as possible instead of in real time")
+    parser.add_argument("--loop", action="store_true",
+                        help="Restart file/synthetic sources when they run out")
+    parser.add_argument("--yolo-backend", choices=BACKENDS,
+                        help="Inference backend for the YOLO models (default: torch, "
+                             "or ASSISTANT_YOLO_BACKEND)")
+    parser.add_argument("--currency-backend", choices=CURRENCY_BACKEND_CHOICES,
+                        help="Inference backend for the currency CNN "
+                             "(default: function, or ASSISTANT_CURRENCY_BACKEND)")
+    parser.add_argument("--caption-profile", choices=CAPTION_PROFILE_CHOICES,
+                        help="BLIP captioning profile (default: auto, or ASSISTANT_CAPTION_PROFILE)")
+    parser.add_argument("--voice-source",
+                        help="Voice command input: mic (default) or a 16 kHz mono WAV file "
+                             "(or ASSISTANT_VOICE_SOURCE)")
+    parser.add_argument("--prerender-phrases", action="store_true",
+                        help="Render the fixed announcements to the phrase cache and exit")
+    parser.add_argument("--preload", action="store_true",
+                        help="Import the modes in the background while the menu is shown")
+    parser.add_argument("--no-model-preload", action="store_true",
+                        help="Do not load the likely next mode's models while the menu waits")
+    parser.add_argument("--headless", action="store_true",
+                        help="Do not draw or open windows (default when there is no display, "
+                             "or ASSISTANT_HEADLESS=1)")
+    parser.add_argument("--display-fps", type=float,
+                        help="Show at most this many frames per second (default: 15, or ASSISTANT_DISPLAY_FPS)")
+    parser.add_argument("--metrics-file",
+                        help="Append latency histograms and counters as JSON lines to this file "
+                             "(or ASSISTANT_METRICS_FILE)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve metrics as text on http://127.0.0.1:PORT/metrics (or ASSISTANT_METRICS_PORT)")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL,
+                        help="Seconds between metrics file exports (default: 10, or ASSISTANT_METRICS_INTERVAL)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print import times and time to first speech as JSON, then exit")
+    return parser.parse_args(argv)
+
+def timed_import(module_name):
+    """Import a module, recording how long its first import took"""
+    with import_lock:
+        loaded = module_name in sys.modules
+    start = time.time()
+    module = importlib.import_module(module_name)
+    if not loaded:
+        with import_lock:
+            import_times.setdefault(module_name, time.time() - start)
+        configure_module(module)
+    return module
+
+def configure_module(module):
+    """Apply command line options and register phrases for a newly imported module"""
+    name = module.__name__
+    try:
+        if name == "src.modes.currency_detection" and options and options.currency_backend:
+            module.set_currency_backend(options.currency_backend)
+        elif name == "src.modes.captioning" and options and options.caption_profile:
+            module.set_caption_profile(options.caption_profile)
+        elif name == "src.recognition.voice_commands" and options and options.voice_source:
+            module.set_voice_source(options.voice_source)
+    except ValueError as e:
+        print(f"Ignoring option: {e}")
+    phrases = getattr(module, "ANNOUNCEMENT_PHRASES", None)
+    if phrases:
+        register_phrases(phrases)
+
+def load_mode(command):
+    """Return the run function of a mode, importing it on first use"""
+    module_name, func_name, _ = MODES[command]
+    return getattr(timed_import(module_name), func_name)
+
+def create_preloader():
+    """Build the menu-time model preloader over every mode's model loader"""
+    loaders, size_hints = {}, {}
+    for command, (module_name, _, loader_name) in MODES.items():
+        loaders[command] = lambda m=module_name, f=loader_name: getattr(timed_import(m), f)()
+        size_hints[command] = lambda m=module_name: sum(
+            path_size(path) for path in getattr(timed_import(m), "MODEL_FILES", ()))
+    return ModelPreloader(loaders, size_hints)
+
+def voice_commands():
+    """The voice command module (imports Vosk on first use)"""
+    return timed_import("src.recognition.voice_commands")
+
+def voice_active():
+    """Whether voice commands are being listened for (without importing Vosk)"""
+    module = sys.modules.get("src.recognition.voice_commands")
+    return module is not None and module.voice_commands_active()
+
+def preload_modules():
+    """Import the modes in the background so entering them later is instant"""
+    def run():
+        for module_name in PRELOAD_ORDER:
+            try:
+                timed_import(module_name)
+            except Exception as e:
+                print(f"[Preload] Could not import {module_name}: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
+def startup_report():
+    """Import times and time to first speech, relative to process start"""
+    first_speech = get_speech_stats().get("first_speech_at")
+    with import_lock:
+        imports = {name: round(1000 * seconds, 1) for name, seconds in import_times.items()}
+    return {
+        "startup_imports_ms": round(1000 * STARTUP_IMPORT_SECONDS, 1),
+        "imports_ms": imports,
+        "time_to_first_speech_ms": round(1000 * (first_speech - START_TIME), 1) if first_speech else None,
+    }
 
 def check_models_directory():
     """Verify models directory structure and required files"""
     # [existing code]
 
+def wait_for_command(prompt, valid=None):
+    """Print a prompt and block until a typed, key or voice command arrives
+
+    With valid given, other commands are reported and the prompt is shown again.
+    """
+    print(prompt, end="", flush=True)
+    while True:
+        # Short timeouts keep Ctrl+C responsive on every platform
+        command = command_bus.wait(timeout=0.5)
+        if not command:
+            continue
+        if valid is not None and command not in valid:
+            print(f"Unknown command '{command}'. Try {', '.join(valid)}.")
+            print(prompt, end="", flush=True)
+            continue
+        print()
+        return command
+
 def ask_for_mode():
     """Ask user which mode they want to use"""
     speak("Which mode would you like to use? Navigation, Captioning, Sign Detection, Currency Detection, or Voice Command?")
-    return input("\nEnter mode (nav/cap/sign/curr/voice/exit): ").strip().lower()
+    if preloader is not None:
+        preloader.start()
+    command = wait_for_command("\nEnter mode (nav/cap/sign/curr/voice/exit): ", MENU_COMMANDS)
+    if preloader is not None and command in MODES:
+        preloader.claim(command)
+    return command
 
 def handle_mode_selection(command):
     """Handle mode selection with proper feedback"""
-    global speech_running  # Move this to the top of the function
+    if preloader is not None:
+        preloader.record(command)
     
     if command == "nav":
         speak("Starting navigation mode.")
         time.sleep(0.5)  # Give time for speech to finish
-        return run_navigation_mode(speak, speech_running)
+        return load_mode("nav")(speak, voice_active(), frame_source)
     elif command == "cap":
         speak("Starting captioning mode.")
         time.sleep(0.5)
-        return run_captioning_mode(speak, speech_running)
+        return load_mode("cap")(speak, voice_active(), frame_source)
     elif command == "sign":
         speak("Starting sign detection mode.")
         time.sleep(0.5)
-        return run_sign_detection_mode(speak, speech_running)
+        return load_mode("sign")(speak, voice_active(), frame_source)
     elif command == "curr":
         speak("Starting currency detection mode.")
         time.sleep(0.5)
-        return run_currency_detection_mode(speak, speech_running)
+        return load_mode("curr")(speak, voice_active(), frame_source)
     elif command == "speech":
         is_enabled = toggle_speech()
         if is_enabled:
@@ -58,9 +252,8 @@ def handle_mode_selection(command):
             print("Speech output disabled")
         return None
     elif command == "voice":
-        toggle_voice_commands(speak)
-        speech_running = not speech_running
-        if speech_running:
+        voice_commands().toggle_voice_commands(speak)
+        if voice_active():
             speak("Voice commands are now active. You can speak commands.")
         else:
             speak("Voice commands are now inactive.")
@@ -74,9 +267,35 @@ def handle_mode_selection(command):
         print("Unknown command. Try nav, cap, sign, curr, voice, or exit.")
         return None
 
-def main():
+def main(argv=None):
     """Main application entry point"""
-    global speech_running
+    global frame_source, options, preloader
+    
+    args = options = parse_args(argv)
+    if args.yolo_backend:
+        set_yolo_backend(args.yolo_backend)
+    display.configure(args.display_fps, True if args.headless else None)
+    
+    # Per-stage timings for profiling field units without a debugger
+    exporter = MetricsExporter(metrics, path=args.metrics_file or METRICS_FILE,
+                               port=args.metrics_port or METRICS_PORT, interval=args.metrics_interval)
+    exporter.start()
+    
+    # Fixed announcements play from pre-rendered audio; anything not yet
+    # rendered is spoken live and rendered while speech is idle. Each mode
+    # registers its own phrases when it is imported.
+    register_phrases(MENU_PHRASES)
+    if args.prerender_phrases:
+        for module_name, _, _ in MODES.values():
+            timed_import(module_name)
+        rendered, failed = prerender_phrases()
+        print(f"Rendered {rendered} phrases, {failed} failed (spoken live instead).")
+        cleanup_tts()
+        return
+    
+    if args.source != "camera":
+        frame_source = timed_import("src.utils.frame_sources").open_frame_source(
+            args.source, realtime=not args.fast, loop=args.loop)
     
     # Check models
     check_models_directory()
@@ -90,21 +309,36 @@ def main():
     print("  voice   - Toggle voice command mode (default: OFF)")
     print("  speech  - Toggle speech output (default: ON)")
     print("  exit    - Exit the assistant")
+    if display.headless:
+        print("Headless: no windows are shown. Type q, n, c, s, m or v and Enter for the mode shortcuts.")
     print("=============================================\n")
 
     # Welcome message
     speak("Welcome to AI Assistant for the Visually Impaired.")
+    if args.startup_report:
+        # Wait for the welcome to start playing, report and leave
+        deadline = time.time() + 10
+        while get_speech_stats().get("first_speech_at") is None and time.time() < deadline:
+            time.sleep(0.01)
+        print(json.dumps(startup_report()))
+        cleanup_tts()
+        return
+    if args.preload:
+        preload_modules()
+    if not args.no_model_preload:
+        preloader = create_preloader()
     time.sleep(1)
     
     # Ask user if they want to enable voice commands at startup instead of auto-enabling
     print("\nWould you like to enable voice commands? (yes/no)")
     speak("Would you like to enable voice commands?")
     
-    voice_choice = input("Enable voice commands? (yes/no): ").strip().lower()
+    # Typed lines arrive on the command bus alongside window keys and voice
+    command_bus.start_keyboard()
+    voice_choice = wait_for_command("Enable voice commands? (yes/no): ")
     if voice_choice in ["yes", "y"]:
-        if VOSK_AVAILABLE:
-            speech_running = True
-            start_voice_commands(speak)
+        if voice_commands().VOSK_AVAILABLE:
+            voice_commands().start_voice_commands(speak)
             speak("Voice commands activated. You can now speak your mode choice.")
         else:
             speak("Voice command system is not available. Using keyboard input only.")
@@ -113,33 +347,25 @@ def main():
     
     # Main interaction loop    
     try:
+        mode = None
         while True:
-            # Ask user which mode they want
-            mode = None
-            
-            # First check voice commands if enabled
-            if speech_running:
-                print("Listening for voice command... (or type a command)")
-                for _ in range(5):  # Check for 5 seconds max
-                    mode = check_voice_commands()
-                    if mode:
-                        print(f"Voice command detected: {mode}")
-                        break
-                    time.sleep(1)
-            
-            # If no voice command, ask for typed input
-            if not mode:
+            # Ask user which mode they want, unless a mode switched straight to another
+            if mode is None:
+                if voice_active():
+                    print("Listening for voice command... (or type a command)")
                 mode = ask_for_mode()
             
             # Execute the selected mode
             result = handle_mode_selection(mode)
+            mode = None
             
             # Check if we should exit
             if result == "exit":
                 break
             elif result == "voice":
-                toggle_voice_commands(speak)
-                speech_running = not speech_running
+                voice_commands().toggle_voice_commands(speak)
+            elif result in MODE_COMMANDS:
+                mode = result
                 
     except KeyboardInterrupt:
         print("\nInterrupted. Exiting gracefully...")
@@ -147,12 +373,55 @@ def main():
         print(f"Error in main loop: {e}")
     finally:
         # Stop voice commands
-        if speech_running:
-            stop_voice_commands()
+        if voice_active():
+            voice_commands().stop_voice_commands()
+        
+        # Close any window still open
+        display.stop()
+        
+        # Release the frame source and the shared camera (if a mode opened it)
+        if frame_source is not None:
+            frame_source.release()
+        camera = sys.modules.get("src.utils.camera")
+        if camera is not None:
+            camera.release_camera()
         
         # Clean up TTS resources
         cleanup_tts()
         
+        # Report how long announcements waited in the speech queue
+        speech_stats = get_speech_stats()
+        print(f"Speech: {speech_stats.get('spoken', 0)} spoken, "
+              f"{speech_stats.get('preempted', 0)} preempted, "
+              f"{speech_stats.get('superseded', 0)} superseded, "
+              f"{speech_stats.get('expired', 0)} expired")
+        for priority, latency in sorted(speech_stats["queue_latency"].items()):
+            print(f"  priority {priority}: queue wait {latency['mean_ms']} ms mean, {latency['p95_ms']} ms p95")
+        phrases = speech_stats["phrase_cache"]
+        print(f"Phrase cache: {phrases['rendered']}/{phrases['phrases']} phrases rendered, "
+              f"{phrases['failed']} failed to render, "
+              f"{phrases['hits']} segments played from memory, {phrases['misses']} synthesized live")
+        
+        # Remember which modes were used so the next start preloads the right one
+        if preloader is not None:
+            preloader.save()
+            print(f"Model preloader: {preloader.summary()}")
+        
+        # Report how often mode switches reused warm models
+        stats = get_model_cache_stats()
+        print(f"Model cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions, {stats['used_mb']}/{stats['budget_mb']} MB used")
+        
+        # Report startup cost so import-time regressions are noticed
+        report = startup_report()
+        print(f"Startup: {report['startup_imports_ms']} ms of imports before the menu, "
+              f"first speech after {report['time_to_first_speech_ms']} ms")
+        for name, ms in sorted(report["imports_ms"].items(), key=lambda item: -item[1]):
+            print(f"  import {name}: {ms} ms")
+        
+        # Write the last metrics snapshot
+        exporter.stop()
+        
         # Final cleanup
         print("Goodbye!")
 
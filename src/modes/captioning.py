@@ -1,10 +1,22 @@
 import cv2
 import time
 import os
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
 
 # Import from our modules
-from ..utils.ui import add_controls_overlay, handle_common_keys
-from ..recognition.voice_commands import check_voice_commands
+from ..utils.ui import draw_status_text
+from ..utils.log import log
+from ..utils.model_cache import LoadCancelled, get_model
+from ..utils.camera import get_camera
+from ..utils.helpers import SceneChangeGate, frame_thumbnail, perceptual_hash
+from ..utils.caption_cache import get_caption_cache
+from ..utils.pipeline import ModePipeline, Stage, DROP_OLDEST
+from ..utils.metrics import metrics
+from ..tts.speech_engine import PRIORITY_CAPTION
 
 # Add to the beginning of each mode function
 
@@ -20,45 +32,252 @@ def run_xxx_mode(speak_callback, speech_running):
         # Try to recover by using direct print instead
         print("Starting mode (speech error occurred)")
 
-def initialize_captioning_model():
-    """Initialize the BLIP model for scene captioning"""
-    print("[Captioning] Loading BLIP model...")
+CAPTION_FAILED = "Caption generation failed."
+
+# Fixed announcements, pre-rendered by the phrase cache (captions stay live)
+ANNOUNCEMENT_PHRASES = (
+    "Scene captioning mode started. I will describe what I see.",
+    "Scene captioning model could not be loaded.",
+    "Camera not available for captioning mode.",
+)
+
+BLIP_MODEL_ID = "Salesforce/blip-image-captioning-base"
+BLIP_LOCAL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                              "models", "blip-image-captioning-base")
+MODEL_FILES = (BLIP_LOCAL_DIR,)  # used to estimate memory before preloading
+
+# Captioning profiles:
+#   "default" - float32 eager model with the original decode settings
+#   "cpu"     - dynamic INT8 quantization of the linear layers, a tuned
+#               thread count and short greedy decoding, for CPU-only units
+# "auto" picks "cpu" when no CUDA device is available. torch's thread count
+# is process-wide, so a profile's count is only applied while a caption is
+# generated and restored afterwards.
+CAPTION_PROFILES = {
+    "default": {
+        "quantize": False,
+        "threads": None,
+        "decode": {"max_length": 50},
+    },
+    "cpu": {
+        "quantize": True,
+        "threads": os.cpu_count() or 1,
+        "decode": {"num_beams": 1, "do_sample": False, "max_new_tokens": 20},
+    },
+}
+CAPTION_PROFILE = os.environ.get("ASSISTANT_CAPTION_PROFILE", "auto")
+
+def resolve_caption_profile(profile=None):
+    """Return the profile name to use, resolving "auto" from the available hardware"""
+    profile = profile or CAPTION_PROFILE
+    if profile == "auto":
+        import torch
+        profile = "default" if torch.cuda.is_available() else "cpu"
+    if profile not in CAPTION_PROFILES:
+        print(f"[Captioning] Unknown profile '{profile}', using default.")
+        profile = "default"
+    return profile
+
+def set_caption_profile(profile):
+    """Select the captioning profile used when none is given"""
+    global CAPTION_PROFILE
+    if profile != "auto" and profile not in CAPTION_PROFILES:
+        raise ValueError(f"Unknown caption profile '{profile}', expected auto or one of {tuple(CAPTION_PROFILES)}")
+    CAPTION_PROFILE = profile
+
+@contextmanager
+def torch_threads(threads):
+    """Run the body with torch using this many threads (unchanged when None)"""
+    import torch
+    if not threads:
+        yield
+        return
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+def save_blip_locally(processor, model):
+    """Save the BLIP weights to BLIP_LOCAL_DIR
+
+    They are written to a temporary directory beside it and renamed into
+    place once complete, so an interrupted save never leaves a partial copy
+    for later starts to load.
+    """
+    parent = os.path.dirname(BLIP_LOCAL_DIR)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".blip-", dir=parent)
+    try:
+        processor.save_pretrained(staging)
+        model.save_pretrained(staging)
+        if os.path.isdir(BLIP_LOCAL_DIR):
+            shutil.rmtree(BLIP_LOCAL_DIR)  # an unusable earlier copy
+        os.replace(staging, BLIP_LOCAL_DIR)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+def load_blip(profile="default"):
+    """Load the BLIP processor and model, preferring the local copy under models/
+
+    When no usable local copy exists the weights are fetched from the Hugging
+    Face hub once and saved to models/ so later starts work offline.
+    """
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+    import torch
+    
+    settings = CAPTION_PROFILES[profile]
+    
+    processor = model = None
+    if os.path.isdir(BLIP_LOCAL_DIR):
+        try:
+            processor = BlipProcessor.from_pretrained(BLIP_LOCAL_DIR, local_files_only=True)
+            model = BlipForConditionalGeneration.from_pretrained(BLIP_LOCAL_DIR, local_files_only=True)
+        except Exception as e:
+            log(f"[Captioning] Local BLIP copy is unusable ({e}); downloading it again.")
+            processor = model = None
+    if model is None:
+        processor = BlipProcessor.from_pretrained(BLIP_MODEL_ID)
+        model = BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_ID)
+        try:
+            save_blip_locally(processor, model)
+            log(f"[Captioning] Saved BLIP weights to {BLIP_LOCAL_DIR} for offline use.")
+        except Exception as e:
+            log(f"[Captioning] Could not save BLIP weights locally: {e}")
+    model.eval()
+    
+    if settings["quantize"]:
+        # Dynamic quantization only runs on CPU
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        model = model.to("cuda" if torch.cuda.is_available() else "cpu")
+    # describe_scene decodes with the settings of the profile the model was loaded for
+    model.caption_profile = profile
+    return processor, model
+
+def initialize_captioning_model(profile=None):
+    """Initialize the BLIP model for scene captioning (reused from the model cache when warm)"""
+    log("[Captioning] Loading BLIP model...")
     
     try:
-        from transformers import BlipProcessor, BlipForConditionalGeneration
-        from PIL import Image
-        import torch
-        
-        processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = BlipForConditionalGeneration.from_pretrained(
-            "Salesforce/blip-image-captioning-base"
-        ).to(device)
-        
-        print(f"[Captioning] BLIP model loaded successfully on {device}.")
+        profile = resolve_caption_profile(profile)
+        processor, model = get_model(f"blip_captioning:{profile}", lambda: load_blip(profile))
+        log(f"[Captioning] BLIP model loaded successfully on {model.device} ({profile} profile).")
         return processor, model
+    except LoadCancelled:
+        raise
     except Exception as e:
-        print(f"[Captioning] Error loading BLIP model: {e}")
+        log(f"[Captioning] Error loading BLIP model: {e}")
         return None, None
 
-def describe_scene(frame, processor, model):
-    """Generate caption for the given frame using BLIP model"""
+def stop_on_event(event):
+    """Stopping criteria that ends BLIP generation as soon as event is set"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+    
+    class StopOnEvent(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), event.is_set(), dtype=torch.bool, device=input_ids.device)
+    
+    return StoppingCriteriaList([StopOnEvent()])
+
+def describe_scene(frame, processor, model, cancel_event=None, decode=None, threads=None):
+    """Generate caption for the given frame using BLIP model
+
+    decode holds the generate() settings and threads the torch thread count
+    (by default those of the profile the model was loaded with). Setting
+    cancel_event stops generation after the current token.
+    """
     try:
+        import torch
         from PIL import Image
         # Convert OpenCV BGR to PIL RGB format
         image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
         
         # Process with BLIP
-        inputs = processor(image, return_tensors="pt").to(model.device)
-        out = model.generate(**inputs, max_length=50)
+        profile = CAPTION_PROFILES[getattr(model, "caption_profile", None) or resolve_caption_profile()]
+        settings = dict(decode or profile["decode"])
+        if cancel_event is not None:
+            settings["stopping_criteria"] = stop_on_event(cancel_event)
+        with torch.inference_mode(), torch_threads(threads or profile["threads"]):
+            inputs = processor(image, return_tensors="pt").to(model.device)
+            out = model.generate(**inputs, **settings)
         caption = processor.decode(out[0], skip_special_tokens=True)
         
         return caption.strip()
     except Exception as e:
         print(f"[Captioning] Error generating caption: {e}")
-        return "Caption generation failed."
+        return CAPTION_FAILED
 
-def run_captioning_mode(speak_callback, speech_running):
+class CaptionWorker:
+    """Generate captions on a background thread so the video loop never blocks
+
+    submit() places a frame in a single-slot mailbox, replacing any request
+    the worker has not started yet, so only the freshest frame is captioned.
+    Finished captions are delivered on the captions queue.
+    """
+    
+    def __init__(self, processor, model, caption_cache=None):
+        self.processor = processor
+        self.model = model
+        self.caption_cache = caption_cache
+        self.captions = queue.Queue()
+        self.pending = None
+        self.cond = threading.Condition()
+        self.cancel_event = threading.Event()
+        self.busy = False
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def submit(self, frame):
+        """Request a caption for frame (copied, so the caller may draw on it)"""
+        with self.cond:
+            self.pending = frame.copy()
+            self.cond.notify()
+    
+    def is_idle(self):
+        """True when no caption is being generated or waiting to start"""
+        with self.cond:
+            return not self.busy and self.pending is None
+    
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    return
+                frame, self.pending = self.pending, None
+                self.busy = True
+            
+            try:
+                frame_hash = perceptual_hash(frame)
+                caption = self.caption_cache.lookup(frame_hash) if self.caption_cache else None
+                metrics.count("cap.cache_hits" if caption is not None else "cap.cache_misses")
+                if caption is None:
+                    with metrics.timer("cap.describe_scene"):
+                        caption = describe_scene(frame, self.processor, self.model, self.cancel_event)
+                    if self.cancel_event.is_set():
+                        return
+                    if caption != CAPTION_FAILED and self.caption_cache:
+                        self.caption_cache.store(frame_hash, caption)
+                self.captions.put(caption)
+            finally:
+                with self.cond:
+                    self.busy = False
+    
+    def stop(self, timeout=1.0):
+        """Cancel any in-flight generation and stop the worker"""
+        with self.cond:
+            self.running = False
+            self.pending = None
+            self.cancel_event.set()
+            self.cond.notify()
+        self.thread.join(timeout)
+
+def run_captioning_mode(speak_callback, speech_running, frame_source=None):
     """Run the scene captioning assistant"""
     # Initialize model
     processor, model = initialize_captioning_model()
@@ -67,8 +286,9 @@ def run_captioning_mode(speak_callback, speech_running):
         speak_callback("Scene captioning model could not be loaded.")
         return "exit"
     
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
+    # Read from the given frame source, or the shared camera stream
+    # (which stays open across mode switches)
+    cap = frame_source if frame_source is not None else get_camera()
     if not cap.isOpened():
         print("[Captioning] Error: Cannot access camera.")
         speak_callback("Camera not available for captioning mode.")
@@ -79,67 +299,63 @@ def run_captioning_mode(speak_callback, speech_running):
     last_caption = ""
     last_caption_time = 0
     caption_interval = 5  # Generate a new caption every 5 seconds
+    # ...but only when the scene changed (re-checked at least every 30 seconds)
+    scene_gate = SceneChangeGate(max_age=30)
+    # Near-duplicate scenes (same room, same desk) reuse an earlier caption
+    caption_cache = get_caption_cache()
+    worker = CaptionWorker(processor, model, caption_cache)
     
-    print("\nKeyboard shortcuts:")
-    print("  q - Return to main menu")
-    print("  n - Switch to navigation mode")
-    print("  s - Switch to sign detection mode")
-    print("  m - Switch to currency detection mode")
-    print("  v - Toggle voice commands")
+    def preprocess(ctx):
+        ctx.thumb = frame_thumbnail(ctx.frame)
     
-    next_mode = None
+    def infer(ctx):
+        # Only request a new caption every 'interval' seconds, and only for a changed scene.
+        # BLIP runs on the caption worker's own thread, so this stage never waits for it.
+        nonlocal last_caption_time
+        if (time.time() - last_caption_time > caption_interval and worker.is_idle()
+                and scene_gate.should_infer(ctx.frame, thumb=ctx.thumb)):
+            worker.submit(ctx.frame)
+            last_caption_time = time.time()
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[Captioning] Camera frame acquisition failed.")
-            time.sleep(0.5)
-            continue
-
+    def postprocess(ctx):
+        # Collect captions finished by the background worker
         try:
-            current_time = time.time()
-            
-            # Only generate a new caption every 'interval' seconds
-            if current_time - last_caption_time > caption_interval:
-                caption = describe_scene(frame, processor, model)
-                
-                # Only announce if caption has changed
-                if caption != last_caption:
-                    speak_callback(f"Scene: {caption}")
-                    last_caption = caption
-                
-                last_caption_time = current_time
-
-            # Display the frame with current caption
-            cv2.putText(frame, f"Scene: {last_caption}", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            
-            # Add controls overlay and display
-            frame = add_controls_overlay(frame, speech_running)
-            cv2.imshow("Scene Captioning Assistant", frame)
-            
-        except Exception as e:
-            print(f"[Captioning] Error in processing: {e}")
-        
-        # Check for key presses for mode switching
-        key = cv2.waitKey(1) & 0xFF
-        next_mode = handle_common_keys(key)
-        
-        # Check for voice commands
-        if next_mode is None:
-            next_mode = check_voice_commands()
-        
-        if next_mode:
-            if next_mode != "exit":
-                print(f"Switching to {next_mode} mode.")
-                speak_callback(f"Switching to {next_mode} mode.")
-            else:
-                print("Returning to main menu.")
-                speak_callback("Returning to main menu.")
-            break
-            
-    # Clean up
-    cap.release()
-    cv2.destroyAllWindows()
+            ctx.caption = worker.captions.get_nowait()
+        except queue.Empty:
+            ctx.caption = None
+    
+    def announce(ctx):
+        # Announce new captions, if they changed
+        nonlocal last_caption
+        if ctx.caption is not None and ctx.caption != last_caption:
+            speak_callback(f"Scene: {ctx.caption}", priority=PRIORITY_CAPTION, kind="caption")
+            last_caption = ctx.caption
+        ctx.shown_caption = last_caption
+    
+    def render(ctx):
+        # Display the frame with current caption
+        draw_status_text(ctx.frame, f"Scene: {ctx.shown_caption}", (10, 30), 0.7, (255, 255, 0), 2)
+    
+    # BLIP runs on its own worker, so the stages here are light; stale frames are
+    # still dropped before preprocessing and inference so a caption request
+    # always uses the newest view. Later stages keep every frame so no
+    # finished caption is missed.
+    pipeline = ModePipeline("Captioning", "cap", "Scene Captioning Assistant", cap, [
+        Stage("preprocess", preprocess, policy=DROP_OLDEST),
+        Stage("infer", infer, policy=DROP_OLDEST),
+        Stage("postprocess", postprocess),
+        Stage("announce", announce),
+        Stage("render", render, draw_only=True),
+    ], speech_running)
+    try:
+        next_mode = pipeline.run(speak_callback)
+    finally:
+        # Clean up (the shared camera keeps running for the next mode)
+        worker.stop()
+    print(f"[Captioning] Scene gate {scene_gate.summary()}.")
+    stats = caption_cache.stats()
+    print(f"[Captioning] Caption cache: {100 * stats['hit_ratio']:.0f}% hit ratio, "
+          f"{stats['entries']} entries, {stats['memory_kb']} KB.")
+    caption_cache.save()
     
-    return next_mode
\ No newline at end of file
+    return next_mode
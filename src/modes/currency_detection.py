@@ -4,8 +4,14 @@ import numpy as np
 import os
 
 # Import from our modules
-from ..utils.ui import add_controls_overlay, handle_common_keys
-from ..recognition.voice_commands import check_voice_commands
+from ..utils.ui import draw_status_text
+from ..utils.log import log
+from ..utils.model_cache import get_model
+from ..utils.camera import get_camera
+from ..utils.helpers import frame_thumbnail, SceneChangeGate
+from ..utils.pipeline import ModePipeline, Stage, DROP_OLDEST
+from ..utils.yolo_backend import calibration_key
+from ..tts.speech_engine import PRIORITY_CURRENCY
 
 # Add to the beginning of each mode function
 
@@ -21,48 +27,198 @@ def run_xxx_mode(speak_callback, speech_running):
         # Try to recover by using direct print instead
         print("Starting mode (speech error occurred)")
 
-def run_currency_detection_mode(speak_callback, speech_running):
-    """Run the currency detection assistant"""
+# Class labels for currency detection
+CLASS_LABELS = ['10', '100', '20', '200', '2000', '50', '500']
+IMG_SIZE = (224, 224)
+
+# Fixed announcements, pre-rendered by the phrase cache
+ANNOUNCEMENT_PHRASES = tuple(f"{label} rupees detected" for label in CLASS_LABELS) + (
+    "Currency detection mode active. Please show currency notes to the camera.",
+    "Error loading currency detection model.",
+    "Camera not available for currency detection.",
+)
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+MODEL_PATH = os.path.join(MODELS_DIR, "custom_cnn_model.h5")
+CALIBRATION_DIR = os.path.join(MODELS_DIR, "calibration")
+MODEL_FILES = (MODEL_PATH,)  # used to estimate memory before preloading
+
+# Classifier backends:
+#   "keras"       - model.predict (slow for batch size 1: builds a data adapter
+#                   and progress callback on every call)
+#   "function"    - the Keras model traced once into a tf.function (default)
+#   "tflite"      - converted to TFLite, cached beside the .h5
+#   "tflite-fp16" - TFLite with float16 weights
+#   "tflite-int8" - TFLite with int8 quantization (calibrated on the images in
+#                   models/calibration/ when present, weights only otherwise)
+CURRENCY_BACKENDS = ("keras", "function", "tflite", "tflite-fp16", "tflite-int8")
+CURRENCY_BACKEND = os.environ.get("ASSISTANT_CURRENCY_BACKEND", "function")
+
+def set_currency_backend(backend):
+    """Select the backend used when initialize_currency_model is called without one"""
+    global CURRENCY_BACKEND
+    if backend not in CURRENCY_BACKENDS:
+        raise ValueError(f"Unknown currency backend '{backend}', expected one of {CURRENCY_BACKENDS}")
+    CURRENCY_BACKEND = backend
+
+def preprocess_currency(frame):
+    """Convert a BGR frame to the CNN's normalized RGB input"""
+    img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, IMG_SIZE)
+    return img.astype(np.float32) / 255.0
+
+def calibration_images(calibration_dir=CALIBRATION_DIR, limit=200):
+    """Paths of the saved frames used to calibrate int8 quantization"""
+    if not os.path.isdir(calibration_dir):
+        return []
+    return sorted(
+        os.path.join(calibration_dir, name) for name in os.listdir(calibration_dir)
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))
+    )[:limit]
+
+def tflite_path(model_path, backend, calibration_dir=CALIBRATION_DIR):
+    """Path of the cached TFLite conversion beside the .h5 file
+
+    int8 conversions also carry the calibration set's key, so adding or
+    changing calibration frames produces a new conversion.
+    """
+    suffix = {"tflite": "", "tflite-fp16": "_fp16", "tflite-int8": "_int8"}[backend]
+    if backend == "tflite-int8":
+        suffix += "-" + calibration_key(calibration_images(calibration_dir))
+    return os.path.splitext(model_path)[0] + suffix + ".tflite"
+
+def convert_to_tflite(model_path, backend, calibration_dir=CALIBRATION_DIR):
+    """Convert the Keras model to TFLite once and return the cached file path
+
+    The conversion is redone when the .h5 file is newer than the cache.
+    """
+    target = tflite_path(model_path, backend, calibration_dir)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(model_path):
+        return target
+
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+
+    log(f"[Currency Detection] Converting model to {backend}...")
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(model_path))
+    if backend == "tflite-fp16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif backend == "tflite-int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        images = calibration_images(calibration_dir)
+        if images:
+            def representative_dataset():
+                for path in images:
+                    frame = cv2.imread(path)
+                    if frame is not None:
+                        yield [preprocess_currency(frame)[None]]
+            converter.representative_dataset = representative_dataset
+        else:
+            log("[Currency Detection] No calibration images; using weight-only int8 quantization.")
+
+    with open(target, "wb") as f:
+        f.write(converter.convert())
+    return target
+
+class CurrencyClassifier:
+    """Currency CNN behind a selectable fast-path backend
+
+    model is the Keras model, or the path of the TFLite file when running
+    through the TFLite interpreter.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, backend=None, num_threads=None):
+        self.backend = backend or CURRENCY_BACKEND
+        if self.backend not in CURRENCY_BACKENDS:
+            log(f"[Currency Detection] Unknown backend '{self.backend}', using function.")
+            self.backend = "function"
+
+        import tensorflow as tf
+        if self.backend.startswith("tflite"):
+            self.model = convert_to_tflite(model_path, self.backend)
+            self.interpreter = tf.lite.Interpreter(model_path=self.model, num_threads=num_threads)
+            self.input_index = self.interpreter.get_input_details()[0]["index"]
+            self.output_index = self.interpreter.get_output_details()[0]["index"]
+            self.batch_size = None
+            return
+
+        from tensorflow.keras.models import load_model
+        self.model = load_model(model_path)
+        if self.backend == "function":
+            # Trace once for any batch size; calls skip predict()'s per-call setup
+            self.forward = tf.function(
+                lambda x: self.model(x, training=False),
+                input_signature=[tf.TensorSpec([None, IMG_SIZE[1], IMG_SIZE[0], 3], tf.float32)],
+            )
+
+    def predict(self, batch):
+        """Class probabilities for a preprocessed (N, H, W, 3) float32 batch"""
+        if self.backend == "keras":
+            return self.model.predict(batch, verbose=0)
+        if self.backend == "function":
+            return self.forward(batch).numpy()
+
+        # TFLite: resize the input only when the batch size changes
+        if self.batch_size != len(batch):
+            self.interpreter.resize_tensor_input(self.input_index, list(batch.shape))
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(batch)
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)
+
+    def classify_batch(self, frames):
+        """Classify a list of frames in one forward pass, returning (label, confidence) per frame"""
+        return self.classify_inputs(np.stack([preprocess_currency(frame) for frame in frames]))
+
+    def classify_inputs(self, batch):
+        """Like classify_batch, for inputs already passed through preprocess_currency"""
+        preds = self.predict(batch)
+        results = []
+        for row in preds:
+            class_idx = int(np.argmax(row))
+            label = CLASS_LABELS[class_idx] if class_idx < len(CLASS_LABELS) else 'Unknown'
+            results.append((label, float(np.max(row))))
+        return results
+
+    def __call__(self, frame):
+        """Classify one frame, returning (label, confidence)"""
+        return self.classify_batch([frame])[0]
+
+def initialize_currency_model(backend=None):
+    """Load the currency classifier (reused from the model cache when warm)"""
+    backend = backend or CURRENCY_BACKEND
+    return get_model(f"currency_cnn:{backend}", lambda: CurrencyClassifier(MODEL_PATH, backend))
+
+def register_currency_model(scheduler):
+    """Register the batched currency classifier ("currency") with an InferenceScheduler"""
+    classifier = initialize_currency_model()
+    scheduler.register("currency", classifier.classify_batch)
+    return classifier
+
+def run_currency_detection_mode(speak_callback, speech_running, frame_source=None,
+                                scheduler=None, stream_id=None, commands=None):
+    """Run the currency detection assistant
+
+    Pass a shared InferenceScheduler (with register_currency_model applied)
+    and a stream_id to batch this stream's inference with other streams, and
+    a CommandBus of the stream's own to take its commands from.
+    """
     print("[Currency Detection] Loading model...")
     
     try:
-        from tensorflow.keras.models import load_model
-        
-        # Class labels for currency detection
-        class_labels = ['10', '100', '20', '200', '2000', '50', '500']
-        img_size = (224, 224)
+        classifier = initialize_currency_model()
         
-        # Get model path
-        models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
-        model_path = os.path.join(models_dir, "custom_cnn_model.h5")
-        
-        # Load currency model
-        model = load_model(model_path)
-        
-        def detect_currency(frame):
-            # Preprocess image
-            img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = cv2.resize(img, img_size)
-            img = img.astype(np.float32) / 255.0
-            img = np.expand_dims(img, axis=0)
-            
-            # Get predictions
-            preds = model.predict(img)
-            class_idx = np.argmax(preds)
-            confidence = float(np.max(preds))
-            
-            # Get label
-            label = class_labels[class_idx] if class_idx < len(class_labels) else 'Unknown'
-            return label, confidence
-            
         print("[Currency Detection] Model loaded successfully.")
     except Exception as e:
         print(f"[Currency Detection] Error loading model: {e}")
         speak_callback("Error loading currency detection model.")
         return "exit"
     
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
+    # Read from the given frame source, or the shared camera stream
+    # (which stays open across mode switches)
+    cap = frame_source if frame_source is not None else get_camera()
     if not cap.isOpened():
         print("[Currency Detection] Error: Cannot access camera.")
         speak_callback("Camera not available for currency detection.")
@@ -74,73 +230,63 @@ def run_currency_detection_mode(speak_callback, speech_running):
     last_announcement_time = 0
     min_confidence = 0.7  # Minimum confidence threshold
     
-    print("\nKeyboard shortcuts:")
-    print("  q - Return to main menu")
-    print("  n - Switch to navigation mode")
-    print("  c - Switch to captioning mode")
-    print("  s - Switch to sign detection mode")
-    print("  v - Toggle voice commands")
+    # Reuse the last prediction while the note is held still
+    scene_gate = SceneChangeGate()
+    last_result = None
     
-    next_mode = None
+    def preprocess(ctx):
+        # The scheduler batches whole frames; without it the CNN input is prepared here
+        ctx.thumb = frame_thumbnail(ctx.frame)
+        ctx.input = preprocess_currency(ctx.frame) if scheduler is None else None
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[Currency Detection] Camera frame acquisition failed.")
-            time.sleep(0.5)
-            continue
-
-        try:
-            # Process current frame
-            label, confidence = detect_currency(frame)
-            
-            current_time = time.time()
-            
-            # Only announce if confidence is above threshold
-            if confidence > min_confidence:
-                output_text = f"{label} rupees (Confidence: {confidence:.2f})"
-                
-                # Only announce if label changed or time passed
-                if (label != prev_label or current_time - last_announcement_time > 5) and label != 'Unknown':
-                    speak_callback(f"{label} rupees detected")
-                    prev_label = label
-                    last_announcement_time = current_time
+    def infer(ctx):
+        # Process current frame, unless the scene has not changed
+        nonlocal last_result
+        if scene_gate.should_infer(ctx.frame, thumb=ctx.thumb) or last_result is None:
+            if scheduler is not None:
+                last_result = scheduler.infer("currency", ctx.frame, stream_id)
+            elif ctx.input is not None:
+                last_result = classifier.classify_inputs(ctx.input[None])[0]
             else:
-                output_text = "No currency detected"
-                # If nothing detected for a while, reset prev_label
-                if current_time - last_announcement_time > 10:
-                    prev_label = None
-            
-            # Display information on frame
-            cv2.putText(frame, output_text, (20, 40), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            
-            # Add controls overlay and display
-            frame = add_controls_overlay(frame, speech_running)
-            cv2.imshow('Currency Detection', frame)
-            
-        except Exception as e:
-            print(f"[Currency Detection] Error in processing: {e}")
-        
-        # Check for key presses for mode switching
-        key = cv2.waitKey(1) & 0xFF
-        next_mode = handle_common_keys(key)
-        
-        # Check for voice commands
-        if next_mode is None:
-            next_mode = check_voice_commands()
+                last_result = classifier(ctx.frame)
+        ctx.label, ctx.confidence = last_result
+    
+    def announce(ctx):
+        nonlocal prev_label, last_announcement_time
+        label, confidence = ctx.label, ctx.confidence
+        current_time = time.time()
         
-        if next_mode:
-            if next_mode != "exit":
-                print(f"Switching to {next_mode} mode.")
-                speak_callback(f"Switching to {next_mode} mode.")
-            else:
-                print("Returning to main menu.")
-                speak_callback("Returning to main menu.")
-            break
+        # Only announce if confidence is above threshold
+        if confidence > min_confidence:
+            ctx.output_text = f"{label} rupees (Confidence: {confidence:.2f})"
             
-    # Clean up
-    cap.release()
-    cv2.destroyAllWindows()
+            # Only announce if label changed or time passed
+            if (label != prev_label or current_time - last_announcement_time > 5) and label != 'Unknown':
+                speak_callback(f"{label} rupees detected", priority=PRIORITY_CURRENCY, kind="currency")
+                prev_label = label
+                last_announcement_time = current_time
+        else:
+            ctx.output_text = "No currency detected"
+            # If nothing detected for a while, reset prev_label
+            if current_time - last_announcement_time > 10:
+                prev_label = None
+    
+    def render(ctx):
+        # Display information on frame
+        draw_status_text(ctx.frame, ctx.output_text, (20, 40), 1, (0, 255, 0), 2)
+    
+    # A held note only needs its newest frame classified, so stale frames are
+    # dropped before preprocessing and inference. Announcing and drawing are
+    # cheap and keep every classified frame.
+    pipeline = ModePipeline("Currency Detection", "curr", "Currency Detection", cap, [
+        Stage("preprocess", preprocess, policy=DROP_OLDEST),
+        Stage("infer", infer, policy=DROP_OLDEST),
+        Stage("announce", announce),
+        Stage("render", render, draw_only=True),
+    ], speech_running, commands, stream_id)
+    next_mode = pipeline.run(speak_callback)
+    
+    # Clean up (the shared camera keeps running for the next mode)
+    print(f"[Currency Detection] Scene gate {scene_gate.summary()}.")
     
-    return next_mode
\ No newline at end of file
+    return next_mode
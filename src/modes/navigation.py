@@ -2,11 +2,61 @@ import cv2
 import numpy as np
 import time
 import os
-from ultralytics import YOLO
+from concurrent.futures import ThreadPoolExecutor
 
 # Import from our modules
-from ..utils.ui import add_controls_overlay, handle_common_keys
-from ..recognition.voice_commands import check_voice_commands
+from ..utils.ui import draw_status_text
+from ..utils.log import log
+from ..utils.model_cache import get_model
+from ..utils.yolo_backend import get_yolo_model
+from ..utils.camera import get_camera
+from ..utils.helpers import frame_thumbnail, motion_energy, estimate_global_shift, extract_detections
+from ..utils.tracker import ObjectTracker
+from ..utils.pipeline import ModePipeline, Stage, DROP_OLDEST
+from ..utils.metrics import metrics
+from ..tts.speech_engine import PRIORITY_SAFETY
+
+# Run YOLO and MiDaS concurrently (both release the GIL in native code).
+# With PIPELINE_DEPTH, depth for frame N-1 overlaps detection on frame N,
+# trading one frame of depth lag for lower per-frame latency.
+PARALLEL_INFERENCE = True
+PIPELINE_DEPTH = False
+
+# MiDaS small runs on square 256x256 inputs
+MIDAS_INPUT_SIZE = 256
+
+# Depth changes slowly compared with the frame rate, so MiDaS only runs every
+# DEPTH_REFRESH_INTERVAL frames, or sooner when the scene changes by more than
+# DEPTH_MOTION_THRESHOLD (mean absolute thumbnail difference, 0-1). In between,
+# the cached depth map is reused, shifted by the estimated camera motion when
+# DEPTH_MOTION_COMPENSATION is on. An interval of 1 runs MiDaS on every frame.
+DEPTH_REFRESH_INTERVAL = 5
+DEPTH_MOTION_THRESHOLD = 0.08
+DEPTH_MOTION_COMPENSATION = True
+
+# YOLO runs on every Nth frame; the tracker extrapolates boxes in between
+DETECTION_KEYFRAME_INTERVAL = 3
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+YOLO_MODEL_PATH = os.path.join(MODELS_DIR, "yolov8m.pt")
+MIDAS_MODEL_PATH = os.path.join(MODELS_DIR, "midas_small.onnx")
+MODEL_FILES = (YOLO_MODEL_PATH, MIDAS_MODEL_PATH)  # used to estimate memory before preloading
+
+# Instructions returned by analyze_navigation
+INSTRUCTIONS = {
+    "ahead": "Obstacle ahead. Please stop.",
+    "left": "Objects on your left. Move to the right.",
+    "right": "Objects on your right. Move to the left.",
+    "clear": "Clear path ahead. You can go forward.",
+}
+PATH_CLEAR = "No objects detected. Path is clear."
+
+# Fixed announcements, pre-rendered by the phrase cache
+ANNOUNCEMENT_PHRASES = tuple(INSTRUCTIONS.values()) + (
+    PATH_CLEAR,
+    "Navigation mode started. I will help you navigate.",
+    "Camera not available for navigation mode.",
+)
 
 # Add to the beginning of each mode function
 
@@ -22,171 +72,344 @@ def run_xxx_mode(speak_callback, speech_running):
         # Try to recover by using direct print instead
         print("Starting mode (speech error occurred)")
 
-def initialize_navigation_models():
-    """Initialize the YOLO and MiDaS models"""
-    print("[Navigation] Loading models...")
-    
-    # Get the models directory path
-    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+def initialize_navigation_models(backend=None):
+    """Initialize the YOLO and MiDaS models (reused from the model cache when warm)
+
+    backend selects the YOLO inference backend (see yolo_backend.BACKENDS).
+    """
+    log("[Navigation] Loading models...")
     
     # Load YOLOv8 model
-    yolo_model_path = os.path.join(models_dir, "yolov8m.pt")
-    yolo_model = YOLO(yolo_model_path)
+    yolo_model = get_yolo_model("yolov8m", YOLO_MODEL_PATH, backend)
     
-    # Load MiDaS model
-    midas_model_path = os.path.join(models_dir, "midas_small.onnx")
-    midas = cv2.dnn.readNet(midas_model_path)
+    # Load MiDaS model (OpenCV DNN nets do not expose their size, use the file size)
+    midas = get_model("midas_small", lambda: cv2.dnn.readNet(MIDAS_MODEL_PATH),
+                      size_bytes=os.path.getsize(MIDAS_MODEL_PATH))
     
-    print("[Navigation] Models loaded successfully.")
+    log("[Navigation] Models loaded successfully.")
     return yolo_model, midas
 
 def get_depth_map(frame, midas):
-    """Get depth map from frame using MiDaS model"""
+    """Get depth map from frame using MiDaS model
+
+    The map is returned at MiDaS's native resolution (MIDAS_INPUT_SIZE square);
+    use box_depths to sample it with frame coordinates.
+    """
     try:
-        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (256, 256), swapRB=True, crop=False)
+        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (MIDAS_INPUT_SIZE, MIDAS_INPUT_SIZE), swapRB=True, crop=False)
         midas.setInput(blob)
         depth = midas.forward()[0, :, :]
-        depth = cv2.resize(depth, (frame.shape[1], frame.shape[0]))
         return depth
     except Exception as e:
         print(f"[Navigation] Error creating depth map: {e}")
-        return np.zeros((frame.shape[0], frame.shape[1]))
-
-def analyze_navigation(objects, width):
-    """Analyze objects to determine navigation instructions"""
-    left = right = center = 0
-    for obj in objects:
-        x_center = (obj['box'][0] + obj['box'][2]) // 2
-        if x_center < width // 3:
-            left += 1
-        elif x_center > 2 * width // 3:
-            right += 1
+        return np.zeros((MIDAS_INPUT_SIZE, MIDAS_INPUT_SIZE), dtype=np.float32)
+
+def box_depths(depth_map, boxes, frame_shape):
+    """Mean depth inside each box, computed on the native-resolution depth map
+
+    Box coordinates are scaled from the frame to the depth map and averaged
+    with a summed-area table, so the cost does not depend on box size and no
+    full-frame resize of the depth map is needed. Empty boxes get depth 0.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    dh, dw = depth_map.shape[:2]
+    fh, fw = frame_shape[:2]
+    table = cv2.integral(depth_map.astype(np.float32), sdepth=cv2.CV_64F)
+
+    # Scale to depth-map coordinates, rounding outwards so small boxes keep a cell
+    x1 = np.clip(np.floor(boxes[:, 0] * dw / fw), 0, dw).astype(int)
+    y1 = np.clip(np.floor(boxes[:, 1] * dh / fh), 0, dh).astype(int)
+    x2 = np.clip(np.ceil(boxes[:, 2] * dw / fw), 0, dw).astype(int)
+    y2 = np.clip(np.ceil(boxes[:, 3] * dh / fh), 0, dh).astype(int)
+
+    area = (x2 - x1) * (y2 - y1)
+    sums = table[y2, x2] - table[y1, x2] - table[y2, x1] + table[y1, x1]
+
+    # Boxes that were empty in frame coordinates stay empty
+    valid = (area > 0) & (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    return np.where(valid, sums / np.maximum(area, 1), 0).astype(np.float32)
+
+def get_depth_maps(frames, midas):
+    """Batched get_depth_map for the inference scheduler"""
+    try:
+        blob = cv2.dnn.blobFromImages(frames, 1/255.0, (MIDAS_INPUT_SIZE, MIDAS_INPUT_SIZE), swapRB=True, crop=False)
+        midas.setInput(blob)
+        depth = midas.forward()
+        return [depth[i] for i in range(len(frames))]
+    except Exception:
+        # Exports with a fixed batch dimension of 1 cannot take a batch
+        return [get_depth_map(frame, midas) for frame in frames]
+
+def detect_objects(frame, yolo_model):
+    """Run YOLO on a single frame and return its Results"""
+    return yolo_model(frame, verbose=False)[0]
+
+def detect_objects_batch(frames, yolo_model):
+    """Run YOLO on a list of frames in one call and return one Results per frame"""
+    return list(yolo_model(frames, verbose=False))
+
+def register_navigation_models(scheduler):
+    """Register batched YOLO ("yolo") and MiDaS ("midas") with an InferenceScheduler"""
+    yolo_model, midas = initialize_navigation_models()
+    scheduler.register("yolo", lambda frames: detect_objects_batch(frames, yolo_model))
+    scheduler.register("midas", lambda frames: get_depth_maps(frames, midas))
+    return yolo_model, midas
+
+class TemporalDepth:
+    """Cache of the last MiDaS depth map, reused between refreshes"""
+
+    def __init__(self, interval=DEPTH_REFRESH_INTERVAL, motion_threshold=DEPTH_MOTION_THRESHOLD,
+                 compensate=DEPTH_MOTION_COMPENSATION):
+        self.interval = max(1, interval)
+        self.motion_threshold = motion_threshold
+        self.compensate = compensate
+        self.depth_map = None
+        self.key_thumb = None  # thumbnail of the frame the depth map came from
+        self.frames_since_refresh = 0
+        self.refreshes = 0
+        self.reuses = 0
+
+    def needs_refresh(self, thumb):
+        """Decide whether MiDaS should run for the frame with this thumbnail"""
+        if self.depth_map is None or self.frames_since_refresh + 1 >= self.interval:
+            return True
+        return motion_energy(self.key_thumb, thumb) > self.motion_threshold
+
+    def store(self, depth_map, thumb):
+        """Record a fresh depth map and the thumbnail of its frame"""
+        self.depth_map = depth_map
+        self.key_thumb = thumb
+        self.frames_since_refresh = 0
+        self.refreshes += 1
+
+    def reuse(self, thumb):
+        """Return the cached depth map, shifted to follow global camera motion"""
+        self.frames_since_refresh += 1
+        self.reuses += 1
+        if not self.compensate or thumb is self.key_thumb:
+            return self.depth_map
+
+        dx, dy = estimate_global_shift(self.key_thumb, thumb)
+        if dx == 0 and dy == 0:
+            return self.depth_map
+        dh, dw = self.depth_map.shape[:2]
+        th, tw = thumb.shape[:2]
+        shift = np.float32([[1, 0, dx * dw / tw], [0, 1, dy * dh / th]])
+        return cv2.warpAffine(self.depth_map, shift, (dw, dh), borderMode=cv2.BORDER_REPLICATE)
+
+class NavigationInference:
+    """Run detection and depth estimation for a frame, optionally in parallel"""
+
+    def __init__(self, yolo_model, midas, parallel=PARALLEL_INFERENCE, pipelined=PIPELINE_DEPTH,
+                 temporal_depth=None, scheduler=None, stream_id=None):
+        self.yolo_model = yolo_model
+        self.midas = midas
+        # With a shared InferenceScheduler, requests are batched with other streams
+        self.scheduler = scheduler
+        self.stream_id = stream_id
+        self.parallel = parallel or pipelined
+        self.pipelined = pipelined
+        self.pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="navigation") if self.parallel else None
+        self.temporal = temporal_depth if temporal_depth is not None else TemporalDepth()
+        self.pending_depth = None  # (future, thumbnail) of an in-flight pipelined depth run
+
+    def detect(self, frame):
+        """Run YOLO on one frame, directly or through the scheduler"""
+        with metrics.timer("nav.yolo"):
+            if self.scheduler is not None:
+                return self.scheduler.infer("yolo", frame, self.stream_id)
+            return detect_objects(frame, self.yolo_model)
+
+    def estimate_depth(self, frame):
+        """Run MiDaS on one frame, directly or through the scheduler"""
+        with metrics.timer("nav.depth"):
+            if self.scheduler is not None:
+                return self.scheduler.infer("midas", frame, self.stream_id)
+            return get_depth_map(frame, self.midas)
+
+    def infer(self, frame, detect=True, thumb=None):
+        """Return (yolo results, depth map) for the frame
+
+        With detect=False YOLO is skipped and results is None, for frames
+        where the tracker extrapolates instead of running the detector.
+        """
+        thumb = frame_thumbnail(frame) if thumb is None else thumb
+        self._collect_pending(block=False)
+        refresh = self.temporal.needs_refresh(thumb)
+
+        # Detection only needs the pool when depth also runs on this frame
+        detection = None
+        if detect and refresh and self.parallel:
+            detection = self.pool.submit(self.detect, frame)
+
+        if not refresh:
+            depth_map = self.temporal.reuse(thumb)
+        elif self.pipelined:
+            # Use the depth map started on an earlier frame. Wait for it before
+            # starting the next one so the MiDaS net is never run concurrently.
+            # The frame is copied because the caller draws on it while depth runs.
+            self._collect_pending(block=True)
+            self.pending_depth = (self.pool.submit(self.estimate_depth, frame.copy()), thumb)
+            if self.temporal.depth_map is None:
+                self._collect_pending(block=True)
+            depth_map = self.temporal.reuse(thumb)
+        elif detection is not None:
+            depth_map = self.pool.submit(self.estimate_depth, frame).result()
+            self.temporal.store(depth_map, thumb)
         else:
-            center += 1
+            depth_map = self.estimate_depth(frame)
+            self.temporal.store(depth_map, thumb)
+
+        if detection is not None:
+            results = detection.result()
+        else:
+            results = self.detect(frame) if detect else None
+        return results, depth_map
+
+    def _collect_pending(self, block):
+        """Move a finished pipelined depth map into the temporal cache"""
+        if self.pending_depth is None:
+            return
+        future, thumb = self.pending_depth
+        if block or future.done():
+            self.temporal.store(future.result(), thumb)
+            self.pending_depth = None
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        self.pending_depth = None
+        print(f"[Navigation] Depth refreshed on {self.temporal.refreshes} frames, "
+              f"reused on {self.temporal.reuses} frames.")
+
+def analyze_navigation(boxes, width, depths=None):
+    """Analyze object boxes (N, 4 array of x1, y1, x2, y2) to determine navigation instructions
+
+    depths (from box_depths, MiDaS inverse depth: larger is nearer) break a tie
+    between the sides: the user is steered away from the nearest obstacle.
+    """
+    boxes = np.asarray(boxes).reshape(-1, 4)
+    x_center = (boxes[:, 0] + boxes[:, 2]) // 2
+    on_left = x_center < width // 3
+    on_right = x_center > 2 * width // 3
+    left = int(np.count_nonzero(on_left))
+    right = int(np.count_nonzero(on_right))
+    center = len(boxes) - left - right
     
     if center > 0:
-        return "Obstacle ahead. Please stop."
+        return INSTRUCTIONS["ahead"]
     elif left > right:
-        return "Objects on your left. Move to the right."
+        return INSTRUCTIONS["left"]
     elif right > left:
-        return "Objects on your right. Move to the left."
-    return "Clear path ahead. You can go forward."
+        return INSTRUCTIONS["right"]
+    elif left and depths is not None and len(depths) == len(boxes):
+        nearest_left, nearest_right = depths[on_left].max(), depths[on_right].max()
+        if nearest_left != nearest_right:
+            return INSTRUCTIONS["left"] if nearest_left > nearest_right else INSTRUCTIONS["right"]
+    return INSTRUCTIONS["clear"]
+
+def run_navigation_mode(speak_callback, speech_running, frame_source=None,
+                        parallel=PARALLEL_INFERENCE, pipelined=PIPELINE_DEPTH,
+                        scheduler=None, stream_id=None, commands=None):
+    """Run the navigation assistant
 
-def run_navigation_mode(speak_callback, speech_running):
-    """Run the navigation assistant"""
+    Pass a shared InferenceScheduler (with register_navigation_models applied)
+    and a stream_id to batch this stream's inference with other streams, and
+    a CommandBus of the stream's own to take its commands from.
+    """
     # Initialize models
     yolo_model, midas = initialize_navigation_models()
     coco_classes = yolo_model.names
     
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
+    # Read from the given frame source, or the shared camera stream
+    # (which stays open across mode switches)
+    cap = frame_source if frame_source is not None else get_camera()
     if not cap.isOpened():
         print("[Navigation] Error: Cannot access camera.")
         speak_callback("Camera not available for navigation mode.")
         return "exit"
     
     speak_callback("Navigation mode started. I will help you navigate.")
+    inference = NavigationInference(yolo_model, midas, parallel, pipelined,
+                                    scheduler=scheduler, stream_id=stream_id)
+    tracker = ObjectTracker()
+    frames_seen = 0
     
     prev_instruction = ""
     instruction_time = 0
     
-    print("\nKeyboard shortcuts:")
-    print("  q - Return to main menu")
-    print("  c - Switch to captioning mode")
-    print("  s - Switch to sign detection mode")
-    print("  m - Switch to currency detection mode")
-    print("  v - Toggle voice commands")
+    def preprocess(ctx):
+        ctx.thumb = frame_thumbnail(ctx.frame)
     
-    next_mode = None
+    def infer(ctx):
+        # Process with YOLOv8 on keyframes and get depth information; the
+        # tracker extrapolates in between
+        nonlocal frames_seen
+        ctx.keyframe = frames_seen % DETECTION_KEYFRAME_INTERVAL == 0
+        frames_seen += 1
+        ctx.results, ctx.depth_map = inference.infer(ctx.frame, detect=ctx.keyframe, thumb=ctx.thumb)
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[Navigation] Camera frame acquisition failed.")
-            time.sleep(0.5)
-            continue
-
-        try:
-            # Process with YOLOv8
-            results = yolo_model(frame)[0]
-            
-            # Get depth information
-            depth_map = get_depth_map(frame, midas)
-            objects_detected = []
-
-            # Process detections
-            for result in results.boxes:
-                cls_id = int(result.cls)
-                cls_name = coco_classes[cls_id]
-                conf = float(result.conf)
-                
-                # Skip low confidence detections
-                if conf < 0.5:
-                    continue
-                    
-                box = result.xyxy[0].cpu().numpy().astype(int)
-                x1, y1, x2, y2 = box
-                
-                # Get average depth in region
-                region_depth = depth_map[y1:y2, x1:x2]
-                if region_depth.size > 0:
-                    avg_depth = np.mean(region_depth)
-                else:
-                    avg_depth = 0
-
-                objects_detected.append({
-                    'name': cls_name,
-                    'conf': conf,
-                    'box': box,
-                    'depth': avg_depth
-                })
-
-                # Draw on frame
-                label = f"{cls_name} {conf:.2f}"
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-            # Get navigation instruction
-            instruction = analyze_navigation(objects_detected, frame.shape[1])
-            cv2.putText(frame, instruction, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-            current_time = time.time()
-            # Speak only if instruction changed or every 5 seconds
-            if (instruction != prev_instruction or current_time - instruction_time > 5) and objects_detected:
-                names = ", ".join(set([obj['name'] for obj in objects_detected]))
-                speak_callback(f"I see {names}. {instruction}")
-                prev_instruction = instruction
-                instruction_time = current_time
-            elif not objects_detected and current_time - instruction_time > 5:
-                speak_callback("No objects detected. Path is clear.")
-                instruction_time = current_time
-
-            # Add controls overlay and display
-            frame = add_controls_overlay(frame, speech_running)
-            cv2.imshow("Navigation Assistant", frame)
-            
-        except Exception as e:
-            print(f"[Navigation] Error in processing: {e}")
-        
-        # Check for key presses for mode switching
-        key = cv2.waitKey(1) & 0xFF
-        next_mode = handle_common_keys(key)
+    def postprocess(ctx):
+        if ctx.keyframe:
+            ctx.born, ctx.died = tracker.update(*extract_detections(ctx.results, min_conf=0.5))
+        else:
+            ctx.born, ctx.died = [], []
+            tracker.predict()
         
-        # Check for voice commands
-        if next_mode is None:
-            next_mode = check_voice_commands()
+        boxes, ctx.confs, ctx.cls_ids, ctx.track_ids = tracker.active_arrays()
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, ctx.frame.shape[1])
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, ctx.frame.shape[0])
+        ctx.boxes = boxes
+        ctx.depths = box_depths(ctx.depth_map, boxes, ctx.frame.shape)
+        # Objects are announced nearest first
+        depth_by_id = dict(zip(ctx.track_ids.tolist(), ctx.depths.tolist()))
+        seen = ctx.born if ctx.born else tracker.active_tracks()
+        ctx.seen = sorted(seen, key=lambda track: -depth_by_id.get(track.id, 0.0))
         
-        if next_mode:
-            if next_mode != "exit":
-                print(f"Switching to {next_mode} mode.")
-                speak_callback(f"Switching to {next_mode} mode.")
-            else:
-                print("Returning to main menu.")
-                speak_callback("Returning to main menu.")
-            break
-            
-    # Clean up
-    cap.release()
-    cv2.destroyAllWindows()
+        # Get navigation instruction
+        ctx.instruction = analyze_navigation(boxes, ctx.frame.shape[1], ctx.depths)
+    
+    def announce(ctx):
+        nonlocal prev_instruction, instruction_time
+        current_time = time.time()
+        # Speak when objects appear, when the instruction changes, or every 5 seconds
+        if len(ctx.boxes) and (ctx.born or ctx.instruction != prev_instruction or current_time - instruction_time > 5):
+            names = ", ".join(dict.fromkeys(coco_classes[track.cls_id] for track in ctx.seen))
+            # Instruction first: it is a fixed phrase and plays from the phrase cache
+            speak_callback(f"{ctx.instruction} I see {names}.", priority=PRIORITY_SAFETY, kind="navigation")
+            prev_instruction = ctx.instruction
+            instruction_time = current_time
+        elif not len(ctx.boxes) and (ctx.died or current_time - instruction_time > 5):
+            speak_callback(PATH_CLEAR, priority=PRIORITY_SAFETY, kind="navigation")
+            prev_instruction = ""
+            instruction_time = current_time
+    
+    def render(ctx):
+        frame = ctx.frame
+        for (x1, y1, x2, y2), conf, cls_id, track_id in zip(ctx.boxes, ctx.confs, ctx.cls_ids, ctx.track_ids):
+            label = f"{coco_classes[cls_id]} #{track_id} {conf:.2f}"
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+        draw_status_text(frame, ctx.instruction, (10, 30), 0.7, (0, 0, 255), 2)
+    
+    # Obstacles are judged on the newest frame, so stale frames are dropped before
+    # preprocessing and inference. After inference every frame is kept: the
+    # tracker must see each keyframe's detections and announcements follow it.
+    pipeline = ModePipeline("Navigation", "nav", "Navigation Assistant", cap, [
+        Stage("preprocess", preprocess, policy=DROP_OLDEST),
+        Stage("infer", infer, policy=DROP_OLDEST),
+        Stage("postprocess", postprocess),
+        Stage("announce", announce),
+        Stage("render", render, draw_only=True),
+    ], speech_running, commands, stream_id)
+    try:
+        next_mode = pipeline.run(speak_callback)
+    finally:
+        # Clean up (the shared camera keeps running for the next mode)
+        inference.close()
     
-    return next_mode
\ No newline at end of file
+    return next_mode
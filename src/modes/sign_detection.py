@@ -1,11 +1,53 @@
 import cv2
 import time
 import os
-from ultralytics import YOLO
 
 # Import from our modules
-from ..utils.ui import add_controls_overlay, handle_common_keys
-from ..recognition.voice_commands import check_voice_commands
+from ..utils.yolo_backend import get_yolo_model
+from ..utils.camera import get_camera
+from ..utils.helpers import extract_detections, frame_thumbnail, SceneChangeGate
+from ..utils.tracker import ObjectTracker
+from ..utils.pipeline import ModePipeline, Stage, DROP_OLDEST
+from ..tts.speech_engine import PRIORITY_SIGN
+
+# YOLO runs on every Nth frame; the tracker extrapolates signs in between
+DETECTION_KEYFRAME_INTERVAL = 3
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+SIGN_MODEL_PATH = os.path.join(MODELS_DIR, "best.pt")
+MODEL_FILES = (SIGN_MODEL_PATH,)  # used to estimate memory before preloading
+
+# Announcement for each sign class
+CONTEXT_MESSAGES = {
+    'bus_stop': "Bus stop ahead.",
+    'do_not_enter': "Do not enter sign detected. Entry is prohibited.",
+    'do_not_stop': "Do not stop sign detected. Stopping is not allowed here.",
+    'do_not_turn_l': "No left turn allowed.",
+    'do_not_turn_r': "No right turn allowed.",
+    'do_not_u_turn': "No U-turn allowed.",
+    'enter_left_lane': "Enter left lane.",
+    'green_light': "Green light. You may proceed.",
+    'left_right_lane': "Left or right lane allowed.",
+    'no_parking': "No parking zone.",
+    'parking': "Parking area ahead.",
+    'ped_crossing': "Pedestrian crossing ahead. Please slow down.",
+    'ped_zebra_cross': "Zebra crossing ahead. Watch for pedestrians.",
+    'railway_crossing': "Railway crossing ahead. Be cautious.",
+    'red_light': "Red light. Please stop.",
+    'stop': "Stop sign detected. Please stop.",
+    't_intersection_l': "T-intersection to the left ahead.",
+    'traffic_light': "Traffic light ahead.",
+    'u_turn': "U-turn allowed here.",
+    'warning': "Warning sign ahead. Please be careful.",
+    'yellow_light': "Yellow light. Prepare to stop."
+}
+
+# Fixed announcements, pre-rendered by the phrase cache
+ANNOUNCEMENT_PHRASES = tuple(CONTEXT_MESSAGES.values()) + (
+    "Sign detection mode active. I will announce road signs I see.",
+    "Error loading sign detection model.",
+    "Camera not available for sign detection.",
+)
 
 # Add to the beginning of each mode function
 
@@ -21,40 +63,30 @@ def run_xxx_mode(speak_callback, speech_running):
         # Try to recover by using direct print instead
         print("Starting mode (speech error occurred)")
 
-def run_sign_detection_mode(speak_callback, speech_running):
-    """Run the road sign detection assistant"""
-    # Road sign contextual messages
-    context_messages = {
-        'bus_stop': "Bus stop ahead.",
-        'do_not_enter': "Do not enter sign detected. Entry is prohibited.",
-        'do_not_stop': "Do not stop sign detected. Stopping is not allowed here.",
-        'do_not_turn_l': "No left turn allowed.",
-        'do_not_turn_r': "No right turn allowed.",
-        'do_not_u_turn': "No U-turn allowed.",
-        'enter_left_lane': "Enter left lane.",
-        'green_light': "Green light. You may proceed.",
-        'left_right_lane': "Left or right lane allowed.",
-        'no_parking': "No parking zone.",
-        'parking': "Parking area ahead.",
-        'ped_crossing': "Pedestrian crossing ahead. Please slow down.",
-        'ped_zebra_cross': "Zebra crossing ahead. Watch for pedestrians.",
-        'railway_crossing': "Railway crossing ahead. Be cautious.",
-        'red_light': "Red light. Please stop.",
-        'stop': "Stop sign detected. Please stop.",
-        't_intersection_l': "T-intersection to the left ahead.",
-        'traffic_light': "Traffic light ahead.",
-        'u_turn': "U-turn allowed here.",
-        'warning': "Warning sign ahead. Please be careful.",
-        'yellow_light': "Yellow light. Prepare to stop."
-    }
-    
+def initialize_sign_model(backend=None):
+    """Load the road sign YOLO model (reused from the model cache when warm)
+
+    backend selects the YOLO inference backend (see yolo_backend.BACKENDS).
+    """
+    return get_yolo_model("sign_best", SIGN_MODEL_PATH, backend)
+
+def register_sign_model(scheduler):
+    """Register the batched road sign detector ("signs") with an InferenceScheduler"""
+    model = initialize_sign_model()
+    scheduler.register("signs", lambda frames: list(model(frames, verbose=False)))
+    return model
+
+def run_sign_detection_mode(speak_callback, speech_running, frame_source=None,
+                            scheduler=None, stream_id=None, commands=None):
+    """Run the road sign detection assistant
+
+    Pass a shared InferenceScheduler (with register_sign_model applied)
+    and a stream_id to batch this stream's inference with other streams, and
+    a CommandBus of the stream's own to take its commands from.
+    """
     print("[Sign Detection] Loading model...")
     try:
-        # Get model path
-        models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
-        model_path = os.path.join(models_dir, "best.pt")
-        
-        model = YOLO(model_path)  # Load road sign detection model
+        model = initialize_sign_model()  # Load road sign detection model
         class_names = model.names
         print("[Sign Detection] Model loaded successfully.")
     except Exception as e:
@@ -62,8 +94,9 @@ def run_sign_detection_mode(speak_callback, speech_running):
         speak_callback("Error loading sign detection model.")
         return "exit"
     
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
+    # Read from the given frame source, or the shared camera stream
+    # (which stays open across mode switches)
+    cap = frame_source if frame_source is not None else get_camera()
     if not cap.isOpened():
         print("[Sign Detection] Error: Cannot access camera.")
         speak_callback("Camera not available for sign detection.")
@@ -71,86 +104,74 @@ def run_sign_detection_mode(speak_callback, speech_running):
     
     speak_callback("Sign detection mode active. I will announce road signs I see.")
     
-    prev_labels = set()
+    tracker = ObjectTracker()
+    frames_seen = 0
+    scene_gate = SceneChangeGate()  # skip keyframes while standing still at a sign
     conf_threshold = 0.7
     
-    print("\nKeyboard shortcuts:")
-    print("  q - Return to main menu")
-    print("  n - Switch to navigation mode")
-    print("  c - Switch to captioning mode")
-    print("  m - Switch to currency detection mode")
-    print("  v - Toggle voice commands")
+    def label_for(cls_id):
+        return class_names[cls_id] if cls_id < len(class_names) else f"Class {cls_id}"
     
-    next_mode = None
+    def preprocess(ctx):
+        ctx.thumb = frame_thumbnail(ctx.frame)
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[Sign Detection] Camera frame acquisition failed.")
-            time.sleep(0.5)
-            continue
-
-        try:
-            # Process with YOLO
-            results = model(frame)[0]
-            detections = results.boxes
-            
-            current_labels = set()
-            valid_detection = False
-            
-            for box in detections:
-                conf = float(box.conf[0])
-                if conf < conf_threshold:
-                    continue
-                    
-                valid_detection = True
-                cls_id = int(box.cls[0])
-                label = class_names[cls_id] if cls_id < len(class_names) else f"Class {cls_id}"
-                
-                # Draw bounding box
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, f"{label.replace('_', ' ')} {conf:.2f}", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                
-                current_labels.add(label)
-            
-            # Announce new signs
-            if valid_detection:
-                new_labels = current_labels - prev_labels
-                for label in new_labels:
-                    label_key = label.lower()
-                    message = context_messages.get(label_key, f"{label_key.replace('_', ' ')} detected.")
-                    speak_callback(message)
-                
-                prev_labels = current_labels
-            
-            # Add controls overlay and display
-            frame = add_controls_overlay(frame, speech_running)
-            cv2.imshow("Road Sign Detection", frame)
-            
-        except Exception as e:
-            print(f"[Sign Detection] Error in processing: {e}")
-        
-        # Check for key presses for mode switching
-        key = cv2.waitKey(1) & 0xFF
-        next_mode = handle_common_keys(key)
-        
-        # Check for voice commands
-        if next_mode is None:
-            next_mode = check_voice_commands()
-        
-        if next_mode:
-            if next_mode != "exit":
-                print(f"Switching to {next_mode} mode.")
-                speak_callback(f"Switching to {next_mode} mode.")
+    def infer(ctx):
+        # YOLO runs on keyframes where the scene changed; tracks are extrapolated otherwise.
+        # A new sign needs a second detection to be confirmed and announced, so
+        # the gate is bypassed while any track is still tentative.
+        nonlocal frames_seen
+        detect = (frames_seen % DETECTION_KEYFRAME_INTERVAL == 0
+                  and (tracker.has_tentative() or scene_gate.should_infer(ctx.frame, thumb=ctx.thumb)))
+        frames_seen += 1
+        ctx.results = None
+        if detect:
+            if scheduler is not None:
+                ctx.results = scheduler.infer("signs", ctx.frame, stream_id)
             else:
-                print("Returning to main menu.")
-                speak_callback("Returning to main menu.")
-            break
-            
-    # Clean up
-    cap.release()
-    cv2.destroyAllWindows()
+                ctx.results = model(ctx.frame, verbose=False)[0]
+    
+    def postprocess(ctx):
+        if ctx.results is not None:
+            ctx.born, _ = tracker.update(*extract_detections(ctx.results, min_conf=conf_threshold))
+        else:
+            ctx.born = []
+            tracker.predict()
+        ctx.tracks = tracker.active_tracks()
+        # Boxes are copied here because the tracker moves on to the next frame while this one is drawn
+        ctx.boxes = [(label_for(track.cls_id), tuple(map(int, track.box.round())), track.conf)
+                     for track in ctx.tracks]
+    
+    def announce(ctx):
+        # Announce signs when a new track appears, unless the same sign is already tracked
+        if ctx.born:
+            born_ids = set(track.id for track in ctx.born)
+            tracked_labels = set(label_for(track.cls_id) for track in ctx.tracks
+                                 if track.id not in born_ids)
+            for label in set(label_for(track.cls_id) for track in ctx.born) - tracked_labels:
+                label_key = label.lower()
+                message = CONTEXT_MESSAGES.get(label_key, f"{label_key.replace('_', ' ')} detected.")
+                speak_callback(message, priority=PRIORITY_SIGN, kind=f"sign:{label_key}")
+    
+    def render(ctx):
+        for label, (x1, y1, x2, y2), conf in ctx.boxes:
+            # Draw bounding box
+            cv2.rectangle(ctx.frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(ctx.frame, f"{label.replace('_', ' ')} {conf:.2f}", (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+    
+    # Signs are detected on the newest frame, so stale frames are dropped before
+    # preprocessing and inference. After inference every frame is kept: the
+    # tracker must see each keyframe's detections to confirm and announce a sign.
+    pipeline = ModePipeline("Sign Detection", "sign", "Road Sign Detection", cap, [
+        Stage("preprocess", preprocess, policy=DROP_OLDEST),
+        Stage("infer", infer, policy=DROP_OLDEST),
+        Stage("postprocess", postprocess),
+        Stage("announce", announce),
+        Stage("render", render, draw_only=True),
+    ], speech_running, commands, stream_id)
+    next_mode = pipeline.run(speak_callback)
+    
+    # Clean up (the shared camera keeps running for the next mode)
+    print(f"[Sign Detection] Scene gate {scene_gate.summary()}.")
     
-    return next_mode
\ No newline at end of file
+    return next_mode
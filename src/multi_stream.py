@@ -0,0 +1,187 @@
+import argparse
+import importlib
+import os
+import sys
+import threading
+
+# Make sure package is importable (for running from command line)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tts.speech_engine import speak, cleanup_tts
+from src.tts.phrase_cache import register_phrases
+from src.utils.camera import CameraStream
+from src.utils.command_bus import command_bus, CommandBus, SHORTCUTS
+from src.utils.display import display
+from src.utils.frame_sources import open_frame_source
+from src.utils.inference_scheduler import InferenceScheduler
+from src.utils.yolo_backend import BACKENDS, set_yolo_backend
+
+# Serves several camera streams from one process (chest and head cameras, or
+# several users on one edge box). Every stream runs its own mode loop on its
+# own frame source, window and command queue, and all of them share one
+# InferenceScheduler, so YOLO, MiDaS and the currency CNN run on micro-batches
+# across streams:
+#
+#     python src/multi_stream.py camera:0 camera:1 --mode nav
+#     python src/multi_stream.py recordings/a.mp4 recordings/b.mp4 --mode sign --batch 4
+#
+# Typed "<stream> <command>" (e.g. "1 sign" or "0 q") goes to one stream. A
+# bare command, a window key or a voice command goes to every stream, since
+# HighGUI does not report which window a key was pressed in. "exit" stops a
+# stream; the runner ends once every stream has stopped. Captioning has no
+# batched model and is not offered here. All streams share one speech queue.
+
+# Mode command -> (module, run function, scheduler registration)
+STREAM_MODES = {
+    "nav": ("src.modes.navigation", "run_navigation_mode", "register_navigation_models"),
+    "sign": ("src.modes.sign_detection", "run_sign_detection_mode", "register_sign_model"),
+    "curr": ("src.modes.currency_detection", "run_currency_detection_mode", "register_currency_model"),
+}
+STREAM_COMMANDS = tuple(STREAM_MODES) + ("exit",)
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Run one assistant mode per camera stream")
+    parser.add_argument("sources", nargs="+",
+                        help="One frame source per stream: camera[:index], a video file, "
+                             "an image directory, or synthetic[:WIDTHxHEIGHT[:FRAMES]]")
+    parser.add_argument("--mode", choices=tuple(STREAM_MODES), default="nav",
+                        help="Mode every stream starts in (default: nav)")
+    parser.add_argument("--batch", type=int, default=4, help="Maximum micro-batch size (default: 4)")
+    parser.add_argument("--wait-ms", type=float, default=10,
+                        help="Longest a request waits for a batch to fill (default: 10)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Play file/synthetic sources as fast as possible instead of in real time")
+    parser.add_argument("--loop", action="store_true",
+                        help="Restart file/synthetic sources when they run out")
+    parser.add_argument("--yolo-backend", choices=BACKENDS,
+                        help="Inference backend for the YOLO models (default: torch, "
+                             "or ASSISTANT_YOLO_BACKEND)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Do not draw or open windows (or ASSISTANT_HEADLESS=1)")
+    parser.add_argument("--display-fps", type=float,
+                        help="Show at most this many frames per second per window (default: 15)")
+    return parser.parse_args(argv)
+
+def open_stream_source(spec, realtime=True, loop=False):
+    """Open a stream's frame source; cameras get a capture thread of their own
+
+    The main assistant shares one camera between its modes; here two streams
+    on different devices must not share it.
+    """
+    if spec == "camera" or spec.startswith("camera:"):
+        camera = CameraStream(int(spec.split(":", 1)[1]) if ":" in spec else 0)
+        camera.start()
+        return camera
+    return open_frame_source(spec, realtime=realtime, loop=loop)
+
+class MultiStreamRunner:
+    """Runs one mode loop per frame source, all sharing one InferenceScheduler"""
+
+    def __init__(self, sources, mode, scheduler, speak_callback=speak):
+        self.sources = sources
+        self.scheduler = scheduler
+        self.speak = speak_callback
+        self.modes = [mode] * len(sources)        # current mode of each stream
+        self.buses = [CommandBus() for _ in sources]
+        self.registered = set()                   # modes whose models the scheduler serves
+        self.register_lock = threading.Lock()
+        self.threads = []
+
+    def load_mode(self, command):
+        """Return a mode's run function, registering its models with the scheduler once"""
+        module_name, run_name, register_name = STREAM_MODES[command]
+        module = importlib.import_module(module_name)
+        with self.register_lock:
+            if command not in self.registered:
+                register_phrases(getattr(module, "ANNOUNCEMENT_PHRASES", ()))
+                getattr(module, register_name)(self.scheduler)
+                self.registered.add(command)
+        return getattr(module, run_name)
+
+    def _run_stream(self, stream_id):
+        mode = self.modes[stream_id]
+        while mode in STREAM_MODES:
+            print(f"[Stream {stream_id}] Starting {mode} mode.")
+            try:
+                mode = self.load_mode(mode)(
+                    self.speak, False, self.sources[stream_id], scheduler=self.scheduler,
+                    stream_id=stream_id, commands=self.buses[stream_id])
+            except Exception as e:
+                print(f"[Stream {stream_id}] Error in {mode} mode: {e}")
+                mode = "exit"
+            self.modes[stream_id] = mode
+        print(f"[Stream {stream_id}] Stopped.")
+
+    def route(self, line):
+        """Send a command to one stream ("1 sign") or, without a stream number, to every stream"""
+        parts = line.split()
+        if len(parts) == 2 and parts[0].isdigit():
+            command = SHORTCUTS.get(parts[1], parts[1])
+            targets = [int(parts[0])] if int(parts[0]) < len(self.buses) else []
+        else:
+            command, targets = line, range(len(self.buses))
+        if command not in STREAM_COMMANDS or not targets:
+            print(f"Unknown command '{line}'. Use nav, sign, curr or exit, "
+                  f"optionally after a stream number (0-{len(self.buses) - 1}).")
+            return
+        for stream_id in targets:
+            self.buses[stream_id].post(command, "router")
+
+    def run(self):
+        """Run every stream until all of them have stopped"""
+        self.threads = [threading.Thread(target=self._run_stream, args=(i,), daemon=True,
+                                         name=f"stream-{i}")
+                        for i in range(len(self.sources))]
+        for thread in self.threads:
+            thread.start()
+        # Typed lines and window keys arrive on the global bus and are routed from here
+        while any(thread.is_alive() for thread in self.threads):
+            line = command_bus.wait(timeout=0.5)
+            if line:
+                self.route(line)
+
+    def stop(self):
+        """Ask every stream to stop and wait for them"""
+        for bus in self.buses:
+            bus.post("exit", "router")
+        for thread in self.threads:
+            thread.join(timeout=5.0)
+
+def main(argv=None):
+    """Multi-stream entry point"""
+    args = parse_args(argv)
+    if args.yolo_backend:
+        set_yolo_backend(args.yolo_backend)
+    display.configure(args.display_fps, True if args.headless else None)
+
+    sources = [open_stream_source(spec, realtime=not args.fast, loop=args.loop) for spec in args.sources]
+    scheduler = InferenceScheduler(max_batch_size=args.batch, max_wait_ms=args.wait_ms)
+    runner = MultiStreamRunner(sources, args.mode, scheduler)
+
+    print(f"Running {len(sources)} streams in {args.mode} mode. "
+          "Type '<stream> <command>' for one stream or a bare command for all of them.")
+    command_bus.start_keyboard()
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted. Stopping streams...")
+        runner.stop()
+    finally:
+        display.stop()
+        scheduler.stop()
+        for source in sources:
+            source.release()
+        cleanup_tts()
+
+        # Report batching and per-stream latency
+        stats = scheduler.stats()
+        for name, model in stats["models"].items():
+            print(f"Model {name}: {model['items']} frames in {model['batches']} batches "
+                  f"(mean batch size {model['avg_batch_size']})")
+        for stream_id, latency in sorted(stats["streams"].items(), key=lambda item: str(item[0])):
+            print(f"Stream {stream_id}: {latency['requests']} requests, "
+                  f"{latency['mean_ms']} ms mean, {latency['p95_ms']} ms p95")
+
+if __name__ == "__main__":
+    main()
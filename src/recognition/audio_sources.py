@@ -0,0 +1,94 @@
+import abc
+import os
+import time
+import wave
+
+# Audio sources the voice command recognizer reads from. All of them return
+# 16 kHz, 16-bit mono PCM from read(frames) and b"" once they run out, so a
+# recorded WAV can be fed through the same pipeline as the microphone (and
+# faster than real time when pacing is off).
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+class AudioSource(abc.ABC):
+    """Base class for audio sources"""
+
+    def __init__(self):
+        self.finished = False
+        self.frames_read = 0
+
+    @abc.abstractmethod
+    def read(self, frames):
+        """Return up to frames samples of PCM audio, or b"" at the end"""
+
+    @property
+    def seconds_read(self):
+        return self.frames_read / SAMPLE_RATE
+
+    def close(self):
+        pass
+
+class MicrophoneSource(AudioSource):
+    """Live microphone input through pyaudio"""
+
+    def __init__(self, chunk=1600):
+        super().__init__()
+        import pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE,
+                                      input=True, frames_per_buffer=chunk)
+        self.stream.start_stream()
+
+    def read(self, frames):
+        data = self.stream.read(frames, exception_on_overflow=False)
+        self.frames_read += len(data) // SAMPLE_WIDTH
+        return data
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.audio.terminate()
+
+class WavFileSource(AudioSource):
+    """A recorded 16 kHz mono 16-bit WAV file, paced in real time or as fast as possible"""
+
+    def __init__(self, path, realtime=False):
+        super().__init__()
+        self.path = path
+        self.realtime = realtime
+        self.wav = wave.open(path, "rb")
+        if (self.wav.getframerate(), self.wav.getnchannels(), self.wav.getsampwidth()) != \
+                (SAMPLE_RATE, 1, SAMPLE_WIDTH):
+            self.wav.close()
+            raise ValueError(f"{path} must be {SAMPLE_RATE} Hz mono 16-bit PCM")
+        self.duration = self.wav.getnframes() / SAMPLE_RATE
+        self.start_time = None
+
+    def read(self, frames):
+        if self.finished:
+            return b""
+        data = self.wav.readframes(frames)
+        if not data:
+            self.finished = True
+            return b""
+
+        if self.start_time is None:
+            self.start_time = time.time()
+        self.frames_read += len(data) // SAMPLE_WIDTH
+        if self.realtime:
+            # Deliver audio no faster than it was recorded
+            delay = self.start_time + self.seconds_read - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self):
+        self.wav.close()
+
+def open_audio_source(spec="mic", realtime=True, chunk=1600):
+    """Open an audio source from a spec: "mic" or the path of a WAV file"""
+    if spec in (None, "", "mic"):
+        return MicrophoneSource(chunk)
+    if os.path.isfile(spec):
+        return WavFileSource(spec, realtime=realtime)
+    raise ValueError(f"Unknown audio source '{spec}'")
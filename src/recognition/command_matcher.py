@@ -0,0 +1,38 @@
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+# command -> (priority, synonyms). Synonyms may be several words long and are
+# matched on whole tokens, so "cap" no longer fires on "escape". When an
+# utterance contains several commands the lowest priority value wins.
+COMMAND_SYNONYMS = {
+    "exit": (0, ("exit", "quit", "menu", "main menu", "go back")),
+    "nav": (1, ("navigate", "navigation")),
+    "cap": (2, ("caption", "captioning", "captions", "scene", "describe")),
+    "sign": (3, ("sign", "signs", "road sign", "road")),
+    "curr": (4, ("currency", "money", "cash", "rupees")),
+}
+
+class CommandMatcher:
+    """Token-level command matcher compiled from a synonym table"""
+
+    def __init__(self, synonyms=COMMAND_SYNONYMS):
+        self.phrases = {}  # token tuple -> (priority, command)
+        for command, (priority, words) in synonyms.items():
+            for phrase in words:
+                key = tuple(TOKEN_PATTERN.findall(phrase.lower()))
+                if key and (key not in self.phrases or priority < self.phrases[key][0]):
+                    self.phrases[key] = (priority, command)
+        self.max_words = max(len(key) for key in self.phrases)
+        self.vocabulary = sorted(set(token for key in self.phrases for token in key))
+
+    def match(self, text):
+        """Return the highest-priority command in text, or None"""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        best = None
+        for start in range(len(tokens)):
+            for length in range(1, min(self.max_words, len(tokens) - start) + 1):
+                hit = self.phrases.get(tuple(tokens[start:start + length]))
+                if hit is not None and (best is None or hit[0] < best[0]):
+                    best = hit
+        return best[1] if best else None
@@ -1,25 +1,45 @@
 import os
 import threading
-import queue
 import json
 import time
 
-# Try to import vosk for speech recognition
+from .audio_sources import SAMPLE_RATE, open_audio_source
+from .command_matcher import CommandMatcher
+from ..utils.command_bus import command_bus
+from ..utils.metrics import metrics
+
+# Try to import vosk for speech recognition (pyaudio is only needed for the microphone)
 try:
     import vosk
-    import pyaudio
     VOSK_AVAILABLE = True
 except ImportError:
     print("Warning: Vosk not available. Install with: pip install vosk pyaudio")
     VOSK_AVAILABLE = False
 
 # Voice command setup
-# Update at the top level of file
-voice_command_queue = queue.Queue()
+# Recognized commands are posted to the shared command bus
 speech_thread = None
 speech_running = False
 auto_start = False  # Don't start automatically
 
+# Recognizer modes:
+#   "grammar" - Vosk is restricted to the command vocabulary and commands fire
+#               from partial results as soon as a keyword is stable (default)
+#   "open"    - open-vocabulary recognition acting on final results only
+VOICE_RECOGNIZER = os.environ.get("ASSISTANT_VOICE_RECOGNIZER", "grammar")
+CHUNK_SAMPLES = {"grammar": 1600, "open": 4000}  # 100 ms vs 250 ms of audio
+
+# Where commands are heard from: "mic" or a recorded 16 kHz mono WAV file
+VOICE_SOURCE = os.environ.get("ASSISTANT_VOICE_SOURCE", "mic")
+
+# Maps recognized text to commands; its words form the recognizer grammar
+# (anything else becomes [unk])
+command_matcher = CommandMatcher()
+COMMAND_VOCABULARY = command_matcher.vocabulary
+
+# A keyword must appear in this many consecutive partial results to fire
+PARTIAL_STABLE_CHUNKS = 2
+
 def initialize_vosk():
     """Initialize Vosk speech recognition model"""
     try:
@@ -43,10 +63,69 @@ def initialize_vosk():
         print(f"Error initializing speech recognition: {e}")
         return None
 
-def process_voice_commands(speak_callback):
+def parse_command(text):
+    """Map recognized text to a mode command, or None"""
+    return command_matcher.match(text)
+
+def create_recognizer(model, recognizer=None):
+    """Build a Vosk recognizer, restricted to COMMAND_VOCABULARY in grammar mode"""
+    recognizer = recognizer or VOICE_RECOGNIZER
+    if recognizer == "grammar":
+        return vosk.KaldiRecognizer(model, SAMPLE_RATE, json.dumps(COMMAND_VOCABULARY + ["[unk]"]))
+    return vosk.KaldiRecognizer(model, SAMPLE_RATE)
+
+class KeywordSpotter:
+    """Turns a stream of audio chunks into commands
+
+    In grammar mode a command fires from partial results once the same
+    keyword has been seen in PARTIAL_STABLE_CHUNKS consecutive partials; the
+    recognizer is then reset so the final result does not fire it again.
+    """
+
+    def __init__(self, model, recognizer=None):
+        self.recognizer = recognizer or VOICE_RECOGNIZER
+        self.rec = create_recognizer(model, self.recognizer)
+        self.candidate = None
+        self.stable = 0
+
+    def accept(self, data):
+        """Feed one chunk of 16-bit mono audio; returns (command, text) or (None, None)"""
+        if self.rec.AcceptWaveform(data):
+            text = json.loads(self.rec.Result()).get("text", "").strip()
+            self.candidate, self.stable = None, 0
+            if text:
+                return parse_command(text), text
+            return None, None
+
+        if self.recognizer != "grammar":
+            return None, None
+
+        partial = json.loads(self.rec.PartialResult()).get("partial", "").strip()
+        command = parse_command(partial) if partial else None
+        if command is not None and command == self.candidate:
+            self.stable += 1
+        else:
+            self.candidate, self.stable = command, int(command is not None)
+        if command is None or self.stable < PARTIAL_STABLE_CHUNKS:
+            return None, None
+
+        self.rec.Reset()
+        self.candidate, self.stable = None, 0
+        return command, partial
+
+    def finish(self):
+        """Flush the recognizer at the end of the audio; returns (command, text)"""
+        text = json.loads(self.rec.FinalResult()).get("text", "").strip()
+        self.candidate, self.stable = None, 0
+        if text:
+            return parse_command(text), text
+        return None, None
+
+def process_voice_commands(speak_callback, source_spec=None):
     """Process voice commands in a separate thread"""
     global speech_running
     
+    source = None
     try:
         if not VOSK_AVAILABLE:
             print("Vosk not available for voice commands.")
@@ -57,53 +136,52 @@ def process_voice_commands(speak_callback):
             print("Could not initialize speech recognition model.")
             return
             
-        # Initialize PyAudio
-        p = pyaudio.PyAudio()
-        rec = vosk.KaldiRecognizer(model, 16000)
+        spotter = KeywordSpotter(model)
+        chunk = CHUNK_SAMPLES.get(spotter.recognizer, 4000)
         
-        # Open microphone stream
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000,
-                        input=True, frames_per_buffer=8000)
-        stream.start_stream()
+        # Open the microphone (or a recording, paced in real time)
+        source = open_audio_source(source_spec or VOICE_SOURCE, realtime=True, chunk=chunk)
         
         print("Voice command system active. Try saying: 'navigation', 'captioning', 'signs', 'currency', or 'exit'")
         speak_callback("Voice commands activated.")
         
         while speech_running:
             try:
-                data = stream.read(4000, exception_on_overflow=False)
+                data = source.read(chunk)
+                if not data:
+                    command, text = spotter.finish()
+                    speech_running = False
+                else:
+                    with metrics.timer("voice.chunk"):
+                        command, text = spotter.accept(data)
                 
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    if "text" in result and result["text"].strip() != "":
-                        command = result["text"].lower()
-                        print(f"Heard: '{command}'")
-                        
-                        # Process command
-                        if "exit" in command or "quit" in command or "menu" in command:
-                            voice_command_queue.put("exit")
-                        elif "nav" in command or "navi" in command or "navigate" in command or "navigation" in command:
-                            voice_command_queue.put("nav")
-                        elif "cap" in command or "scene" in command or "describe" in command or "caption" in command:
-                            voice_command_queue.put("cap")
-                        elif "sign" in command or "road" in command:
-                            voice_command_queue.put("sign")
-                        elif "currency" in command or "money" in command or "cash" in command:
-                            voice_command_queue.put("curr")
+                if text:
+                    print(f"Heard: '{text}'")
+                if command:
+                    metrics.count("voice.commands")
+                    command_bus.post(command, "voice")
             except Exception as e:
                 print(f"Error processing audio: {e}")
                 time.sleep(0.1)  # Brief pause on error to avoid CPU spinning
-                        
-        # Clean up
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
         
     except Exception as e:
         print(f"Error in voice command processing: {e}")
     finally:
+        # Clean up; the recognizer is no longer listening however it ended
+        speech_running = False
+        if source is not None:
+            source.close()
         print("Voice command system stopped.")
 
+def voice_commands_active():
+    """True while the recognizer is listening (False once a recording runs out)"""
+    return speech_running
+
+def set_voice_source(spec):
+    """Select where voice commands are heard from ("mic" or a WAV file path)"""
+    global VOICE_SOURCE
+    VOICE_SOURCE = spec
+
 def start_voice_commands(speak_callback):
     """Start the voice command recognition thread"""
     global speech_thread, speech_running
@@ -140,9 +218,8 @@ def toggle_voice_commands(speak_callback):
             print("Voice commands turned on.")
 
 def check_voice_commands():
-    """Check if there are any voice commands in the queue"""
-    try:
-        command = voice_command_queue.get_nowait()
-        return command
-    except queue.Empty:
-        return None
\ No newline at end of file
+    """Return a pending command from the command bus without blocking
+
+    Kept for callers that poll; the bus also carries keyboard commands.
+    """
+    return command_bus.poll()
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import threading
+import wave
+from collections import deque
+
+# Try to import pyaudio for playing pre-rendered phrases
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    PYAUDIO_AVAILABLE = False
+
+# Fixed announcements (sign messages, navigation instructions, currency
+# results, menu prompts) are rendered to WAV once with pyttsx3 and played
+# from memory afterwards, so they start in milliseconds instead of waiting
+# for live synthesis. Files are keyed by text, voice and rate, so changing
+# the voice re-renders them. Phrases that have not been rendered yet are
+# spoken live and rendered while the speech worker is idle.
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+PHRASE_CACHE_DIR = os.path.join(MODELS_DIR, ".phrase_cache")
+PLAYBACK_CHUNK_FRAMES = 1024  # preemption is checked between chunks
+
+class PhraseClip:
+    """Decoded WAV audio held in memory"""
+
+    def __init__(self, channels, sample_width, rate, frames):
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.frames = frames
+
+    @classmethod
+    def load(cls, path):
+        with wave.open(path, "rb") as wav:
+            return cls(wav.getnchannels(), wav.getsampwidth(), wav.getframerate(),
+                       wav.readframes(wav.getnframes()))
+
+class PhraseCache:
+    """Pre-rendered audio for fixed phrases, played through pyaudio"""
+
+    def __init__(self, cache_dir=PHRASE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.phrases = set()    # registered fixed phrases
+        self.clips = {}         # phrase -> PhraseClip
+        self.pending = deque()  # registered phrases still to render
+        self.voice = None
+        self.rate = None
+        self.lock = threading.Lock()
+        self.audio = None
+        self.streams = {}       # (channels, width, rate) -> open output stream
+        self.hits = 0
+        self.misses = 0
+        self.failed = set()     # phrases the engine could not render (spoken live)
+
+    @property
+    def configured(self):
+        return self.rate is not None
+
+    def configure(self, engine):
+        """Key the cache on the engine's voice and rate and load rendered phrases"""
+        voice, rate = engine.getProperty('voice'), engine.getProperty('rate')
+        with self.lock:
+            if self.configured and (voice, rate) == (self.voice, self.rate):
+                return
+            self.voice, self.rate = voice, rate
+            self.clips.clear()
+            self.pending.clear()
+            phrases = sorted(self.phrases)
+        for phrase in phrases:
+            self._load_or_queue(phrase)
+
+    def register(self, phrases):
+        """Add fixed phrases to the cache"""
+        new = []
+        with self.lock:
+            for phrase in phrases:
+                if phrase not in self.phrases:
+                    self.phrases.add(phrase)
+                    new.append(phrase)
+            configured = self.configured
+        if configured:
+            for phrase in new:
+                self._load_or_queue(phrase)
+
+    def path_for(self, phrase):
+        key = hashlib.sha1(f"{self.voice}|{self.rate}|{phrase}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _load_or_queue(self, phrase):
+        path = self.path_for(phrase)
+        clip = None
+        if os.path.exists(path):
+            try:
+                clip = PhraseClip.load(path)
+            except Exception as e:
+                print(f"[Phrase Cache] Could not load {path}: {e}")
+        with self.lock:
+            if clip is not None:
+                self.clips[phrase] = clip
+            else:
+                self.pending.append(phrase)
+
+    def has_pending(self):
+        return PYAUDIO_AVAILABLE and self.configured and bool(self.pending)
+
+    def render_next(self, engine, cancel_event=None):
+        """Render one pending phrase with the engine
+
+        Returns "rendered", "failed" or "cancelled", or None when no phrase is
+        pending. Setting cancel_event (the speech queue's preempt event, which also
+        stops the engine) abandons the render: the partial file is removed and
+        the phrase stays pending for the next idle moment.
+        """
+        with self.lock:
+            if not self.pending:
+                return None
+            if cancel_event is not None and cancel_event.is_set():
+                return "cancelled"
+            phrase = self.pending.popleft()
+        path = self.path_for(phrase)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            engine.save_to_file(phrase, path)
+            engine.runAndWait()
+            if cancel_event is not None and cancel_event.is_set():
+                if os.path.exists(path):
+                    os.remove(path)
+                with self.lock:
+                    self.pending.appendleft(phrase)
+                return "cancelled"
+            clip = PhraseClip.load(path)
+            with self.lock:
+                self.clips[phrase] = clip
+                self.failed.discard(phrase)
+            return "rendered"
+        except Exception as e:
+            # Some drivers write AIFF or nothing at all; keep speaking this one live
+            print(f"[Phrase Cache] Could not render '{phrase}': {e}")
+            with self.lock:
+                self.failed.add(phrase)
+            return "failed"
+
+    def render_all(self, engine):
+        """Render every pending phrase (used for pre-rendering at install time)
+
+        Returns (rendered, failed) counts.
+        """
+        rendered = failed = 0
+        while True:
+            outcome = self.render_next(engine)
+            if outcome is None:
+                return rendered, failed
+            if outcome == "rendered":
+                rendered += 1
+            elif outcome == "failed":
+                failed += 1
+
+    def split(self, text):
+        """Split text into (segment, clip) parts, clip being None for live synthesis
+
+        Leading registered phrases are matched greedily (longest first), so a
+        fixed instruction followed by dynamic text still plays its prefix from
+        memory.
+        """
+        parts = []
+        rest = text.strip()
+        with self.lock:
+            while rest:
+                match = None
+                if PYAUDIO_AVAILABLE:
+                    for phrase in self.clips:
+                        if rest.startswith(phrase) and (match is None or len(phrase) > len(match)):
+                            match = phrase
+                if match is None:
+                    self.misses += 1
+                    parts.append((rest, None))
+                    break
+                self.hits += 1
+                parts.append((match, self.clips[match]))
+                rest = rest[len(match):].strip()
+        return parts
+
+    def _stream(self, clip):
+        key = (clip.channels, clip.sample_width, clip.rate)
+        if key not in self.streams:
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
+            self.streams[key] = self.audio.open(
+                format=self.audio.get_format_from_width(clip.sample_width),
+                channels=clip.channels, rate=clip.rate, output=True)
+        return self.streams[key]
+
+    def play(self, clip, stop_event=None):
+        """Play a clip, stopping early when stop_event is set; returns False on failure"""
+        try:
+            stream = self._stream(clip)
+            chunk = PLAYBACK_CHUNK_FRAMES * clip.channels * clip.sample_width
+            for start in range(0, len(clip.frames), chunk):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                stream.write(clip.frames[start:start + chunk])
+            return True
+        except Exception as e:
+            print(f"[Phrase Cache] Playback failed: {e}")
+            return False
+
+    def stats(self):
+        """Rendered/pending phrase counts and how many segments played from memory"""
+        with self.lock:
+            return {
+                "phrases": len(self.phrases),
+                "rendered": len(self.clips),
+                "pending": len(self.pending),
+                "failed": len(self.failed),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self):
+        for stream in self.streams.values():
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception:
+                pass
+        self.streams.clear()
+        if self.audio is not None:
+            self.audio.terminate()
+            self.audio = None
+
+phrase_cache = PhraseCache()
+
+def register_phrases(phrases):
+    """Register fixed announcement phrases for pre-rendered playback"""
+    phrase_cache.register(phrases)
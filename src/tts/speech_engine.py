@@ -1,6 +1,29 @@
 import pyttsx3
 import threading
+import heapq
+import itertools
 import time
+from collections import defaultdict, deque
+
+from .phrase_cache import phrase_cache
+from ..utils.metrics import metrics
+
+# Urgency levels (lower is more urgent). A message preempts speech of a
+# lower urgency, and messages of the same kind replace each other while
+# queued so only the latest navigation or currency result is spoken.
+PRIORITY_SAFETY = 0    # obstacle warnings
+PRIORITY_SIGN = 1      # road signs
+PRIORITY_SYSTEM = 2    # menu, mode switches, errors
+PRIORITY_CURRENCY = 3  # currency notes
+PRIORITY_CAPTION = 4   # scene descriptions
+
+# Queued messages older than this (seconds) are dropped instead of spoken
+MAX_QUEUE_AGE = {
+    PRIORITY_SAFETY: 3.0,
+    PRIORITY_SIGN: 5.0,
+    PRIORITY_CURRENCY: 5.0,
+    PRIORITY_CAPTION: 10.0,
+}
 
 # Global variables for TTS
 tts_engine = None
@@ -9,80 +32,262 @@ speaking = threading.Event()
 last_spoken = ""
 last_spoken_time = 0
 speech_enabled = True  # New flag to control if speech is enabled
+first_speech_at = None  # when the first utterance started (for the startup report)
+RENDER_PHRASE = object()  # worker is idle and may render a pending phrase
+
+class SpeechMessage:
+    """One queued utterance"""
+
+    def __init__(self, text, priority, kind):
+        self.text = text
+        self.priority = priority
+        self.kind = kind
+        self.enqueued = time.time()
+        self.cancelled = False
+
+class SpeechQueue:
+    """Single long-lived TTS worker fed by a priority queue"""
+
+    def __init__(self):
+        self.heap = []
+        self.by_kind = {}  # kind -> queued SpeechMessage
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.current = None
+        self.rendering = False  # a phrase is being rendered to the phrase cache
+        self.preempt = threading.Event()
+        self.running = False
+        self.thread = None
+        self.stats = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=200))  # priority -> queue wait
+
+    def start(self):
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def put(self, text, priority, kind):
+        message = SpeechMessage(text, priority, kind)
+        with self.cond:
+            # Already being spoken; restarting it would only repeat the start
+            if self.current is not None and self.current.text == text:
+                return
+            # Supersede a queued message of the same kind
+            if kind is not None:
+                old = self.by_kind.get(kind)
+                if old is not None and not old.cancelled:
+                    old.cancelled = True
+                    self.stats["superseded"] += 1
+                self.by_kind[kind] = message
+            heapq.heappush(self.heap, (priority, next(self.counter), message))
+            self.stats["queued"] += 1
+
+            # Interrupt less urgent speech, or stale speech of the same kind.
+            # Background phrase rendering gives way to any real message.
+            current = self.current
+            if self.rendering or (current is not None and (
+                    priority < current.priority or (kind is not None and kind == current.kind))):
+                self.preempt.set()
+            self.cond.notify()
 
-def get_tts_engine():
+    def _next_message(self):
+        with self.cond:
+            while self.running:
+                while self.heap:
+                    _, _, message = heapq.heappop(self.heap)
+                    if self.by_kind.get(message.kind) is message:
+                        del self.by_kind[message.kind]
+                    if message.cancelled:
+                        continue
+                    max_age = MAX_QUEUE_AGE.get(message.priority)
+                    if max_age is not None and time.time() - message.enqueued > max_age:
+                        self.stats["expired"] += 1
+                        continue
+                    self.current = message
+                    self.preempt.clear()
+                    return message
+                if phrase_cache.has_pending():
+                    self.preempt.clear()
+                    self.rendering = True
+                    return RENDER_PHRASE
+                self.cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            message = self._next_message()
+            if message is None:
+                return
+            if message is RENDER_PHRASE:
+                try:
+                    engine = get_tts_engine(self.preempt)
+                    if engine:
+                        phrase_cache.render_next(engine, self.preempt)
+                finally:
+                    with self.cond:
+                        self.rendering = False
+                continue
+            waited = time.time() - message.enqueued
+            self.latencies[message.priority].append(waited)
+            metrics.observe(f"tts.queue_wait.p{message.priority}", waited)
+            speaking.set()
+            try:
+                with metrics.timer("tts.say"):
+                    _say(message.text, self.preempt)
+                outcome = "preempted" if self.preempt.is_set() else "spoken"
+                self.stats[outcome] += 1
+                metrics.count(f"tts.{outcome}")
+            finally:
+                speaking.clear()
+                with self.cond:
+                    self.current = None
+                    self.cond.notify_all()
+
+    def stop(self, timeout=2.0):
+        """Give queued speech up to timeout seconds to finish, then stop the worker"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while self.running and (self.heap or self.current is not None):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            self.running = False
+            self.heap.clear()
+            self.by_kind.clear()
+            self.preempt.set()
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+
+speech_queue = SpeechQueue()
+
+def create_engine(preempt_event):
+    """Create a pyttsx3 engine that stops mid-utterance when preempt_event is set"""
+    engine = pyttsx3.init()
+    engine.setProperty('rate', 150)
+
+    # Callbacks run on the engine's own loop, so stopping from here is safe
+    def on_word(name, location, length):
+        if preempt_event.is_set():
+            engine.stop()
+    engine.connect('started-word', on_word)
+    return engine
+
+def get_tts_engine(preempt_event=None):
     """Get or create global TTS engine with thread safety"""
     global tts_engine
     with tts_lock:
         if tts_engine is None:
             try:
-                tts_engine = pyttsx3.init()
-                tts_engine.setProperty('rate', 150)
+                tts_engine = create_engine(preempt_event or speech_queue.preempt)
             except Exception as e:
                 print(f"Error initializing TTS engine: {e}")
     return tts_engine
 
-def speak(text):
-    """Thread-safe speaking function that avoids the 'run loop already started' error"""
-    global last_spoken, last_spoken_time
-    
+def _synthesize(text, preempt_event):
+    """Speak text live through pyttsx3, recovering from a stuck run loop"""
+    global tts_engine
+
+    engine = get_tts_engine(preempt_event)
+    if not engine:  # Check if engine initialization failed
+        print(f"Cannot speak: {text} (TTS engine not available)")
+        return
+
+    engine.say(text)
+
+    # This is the part that throws "run loop already started"
+    # We put proper safeguards around it
+    try:
+        engine.runAndWait()
+    except RuntimeError as e:
+        # Handle "run loop already started" error
+        if "run loop already started" in str(e):
+            print("TTS run loop issue detected")
+            # Try to reinitialize the engine
+            with tts_lock:
+                try:
+                    tts_engine = None
+                    tts_engine = create_engine(preempt_event)
+                    tts_engine.say(text)
+                    tts_engine.runAndWait()
+                except Exception as reinit_error:
+                    print(f"Failed to reinitialize TTS: {reinit_error}")
+        else:
+            print(f"TTS Error: {e}")
+
+def _say(text, preempt_event):
+    """Speak text on the worker thread, playing pre-rendered phrases from memory"""
+    global last_spoken, last_spoken_time, first_speech_at
+
+    try:
+        engine = get_tts_engine(preempt_event)
+        if engine and not phrase_cache.configured:
+            phrase_cache.configure(engine)
+
+        for segment, clip in phrase_cache.split(text):
+            if preempt_event.is_set():
+                break
+            if first_speech_at is None:
+                first_speech_at = time.time()
+            if clip is not None and phrase_cache.play(clip, preempt_event):
+                continue
+            _synthesize(segment, preempt_event)
+
+        # An interrupted message was not delivered, so it may be repeated
+        if not preempt_event.is_set():
+            last_spoken = text
+            last_spoken_time = time.time()
+    except Exception as e:
+        print(f"TTS Error: {e}")
+
+def speak(text, priority=PRIORITY_SYSTEM, kind=None):
+    """Queue text for the TTS worker
+
+    priority is one of the PRIORITY_* levels; more urgent messages preempt
+    less urgent speech. Messages with the same kind (e.g. "navigation")
+    replace each other while queued, so stale results are never spoken.
+    """
     # Skip if speech is disabled
     if not speech_enabled:
         print(f"Speech output (disabled): {text}")
         return
-    
+
     # Don't repeat the same phrase too quickly
     if text == last_spoken and time.time() - last_spoken_time < 3:
         return
-    
-    # Don't try to speak if we're already speaking
-    if speaking.is_set():
-        print(f"Already speaking, skipping: {text}")
-        return
-    
-    def speak_thread():
-        global last_spoken, last_spoken_time
-        
-        try:
-            speaking.set()
-            engine = get_tts_engine()
-            if not engine:  # Check if engine initialization failed
-                print(f"Cannot speak: {text} (TTS engine not available)")
-                return
-                
-            engine.say(text)
-            
-            # This is the part that throws "run loop already started"
-            # We put proper safeguards around it
-            try:
-                engine.runAndWait()
-            except RuntimeError as e:
-                # Handle "run loop already started" error
-                if "run loop already started" in str(e):
-                    print("TTS run loop issue detected")
-                    # Try to reinitialize the engine
-                    with tts_lock:
-                        global tts_engine
-                        try:
-                            tts_engine = None
-                            tts_engine = pyttsx3.init()
-                            tts_engine.setProperty('rate', 150)
-                            tts_engine.say(text)
-                            tts_engine.runAndWait()
-                        except Exception as reinit_error:
-                            print(f"Failed to reinitialize TTS: {reinit_error}")
-                else:
-                    print(f"TTS Error: {e}")
-                    
-            last_spoken = text
-            last_spoken_time = time.time()
-        except Exception as e:
-            print(f"TTS Error: {e}")
-        finally:
-            speaking.clear()
-    
-    # Start a new thread to do the speaking
-    threading.Thread(target=speak_thread, daemon=True).start()
+
+    speech_queue.start()
+    speech_queue.put(text, priority, kind)
+
+def get_speech_stats():
+    """Counts of spoken/superseded/preempted/expired messages and queue latency per priority (ms)"""
+    with speech_queue.cond:
+        stats = dict(speech_queue.stats)
+        latency = {}
+        for priority, samples in speech_queue.latencies.items():
+            ordered = sorted(samples)
+            if ordered:
+                latency[priority] = {
+                    "mean_ms": round(1000 * sum(ordered) / len(ordered), 1),
+                    "p95_ms": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 1),
+                }
+    stats["queue_latency"] = latency
+    stats["phrase_cache"] = phrase_cache.stats()
+    stats["first_speech_at"] = first_speech_at
+    return stats
+
+def prerender_phrases():
+    """Render every registered phrase now instead of lazily; returns (rendered, failed) counts"""
+    engine = get_tts_engine()
+    if not engine:
+        return 0, 0
+    phrase_cache.configure(engine)
+    return phrase_cache.render_all(engine)
 
 def toggle_speech():
     """Toggle speech on/off"""
@@ -93,17 +298,16 @@ def toggle_speech():
 def cleanup_tts():
     """Clean up TTS resources"""
     global tts_engine
-    
+
+    # Let pending speech (e.g. the goodbye) finish, then stop the worker
+    speech_queue.stop()
+    phrase_cache.close()
+
     with tts_lock:
         if tts_engine:
             try:
-                # Make sure engine isn't still running
-                if speaking.is_set():
-                    # Wait for speaking to finish
-                    time.sleep(0.5)
-                
                 # Attempt to stop the engine
                 tts_engine.stop()
             except:
                 pass
-            tts_engine = None
\ No newline at end of file
+            tts_engine = None
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Shared camera capture service. One background thread owns the device for
+# the whole session and keeps only the newest frames, so modes always run
+# inference on a fresh frame and switching modes never reopens the camera.
+
+class CameraStream:
+    """Threaded capture with a drop-old ring buffer of timestamped frames"""
+
+    def __init__(self, device=0, buffer_size=2):
+        self.device = device
+        self.frames = deque(maxlen=buffer_size)  # (frame_id, timestamp, frame)
+        self.cond = threading.Condition()
+        self.cap = None
+        self.thread = None
+        self.running = False
+        self.frame_id = 0
+        self.last_read_id = 0
+        self.dropped = 0
+
+    def start(self):
+        """Open the device and start the capture thread"""
+        if self.running:
+            return True
+        self.cap = cv2.VideoCapture(self.device)
+        if not self.cap.isOpened():
+            print("[Camera] Error: Cannot access camera.")
+            self.cap.release()
+            self.cap = None
+            return False
+        # Keep the driver queue short; the ring buffer handles the rest
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def _capture_loop(self):
+        failures = 0
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                failures += 1
+                if failures % 20 == 1:
+                    print("[Camera] Frame acquisition failed.")
+                time.sleep(0.05)
+                continue
+            failures = 0
+            with self.cond:
+                self.frame_id += 1
+                if len(self.frames) == self.frames.maxlen and self.frames[0][0] > self.last_read_id:
+                    self.dropped += 1
+                self.frames.append((self.frame_id, time.time(), frame))
+                self.cond.notify_all()
+
+    def isOpened(self):
+        return self.running
+
+    def read_latest(self, timeout=1.0):
+        """Return (ret, frame, timestamp, frame_id) for the newest unseen frame
+
+        Blocks up to timeout seconds for a frame newer than the last one
+        returned, so the same frame is never analysed twice.
+        """
+        with self.cond:
+            if not self.cond.wait_for(
+                    lambda: self.frames and self.frames[-1][0] > self.last_read_id,
+                    timeout):
+                return False, None, None, None
+            frame_id, timestamp, frame = self.frames[-1]
+            self.last_read_id = frame_id
+            return True, frame, timestamp, frame_id
+
+    def read(self, timeout=1.0):
+        """cv2.VideoCapture-compatible read returning the newest frame"""
+        ret, frame, _, _ = self.read_latest(timeout)
+        return ret, frame
+
+    def stop(self):
+        """Stop the capture thread and release the device"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        with self.cond:
+            self.frames.clear()
+
+    def release(self):
+        """cv2.VideoCapture-compatible alias for stop()"""
+        self.stop()
+
+# Session-wide camera shared by all modes
+_camera = None
+_camera_lock = threading.Lock()
+
+def get_camera(device=None):
+    """Return the shared camera stream, starting it on first use
+
+    device None means whichever camera is already open (device 0 if none).
+    Asking for a different device stops the open camera and opens that one.
+    """
+    global _camera
+    with _camera_lock:
+        if _camera is not None and device is not None and device != _camera.device:
+            print(f"[Camera] Switching from device {_camera.device} to {device}.")
+            _camera.stop()
+            _camera = None
+        if _camera is None:
+            _camera = CameraStream(0 if device is None else device)
+        if not _camera.isOpened():
+            _camera.start()
+        return _camera
+
+def release_camera():
+    """Stop the shared camera stream (call once at session end)"""
+    global _camera
+    with _camera_lock:
+        if _camera is not None:
+            _camera.stop()
+            _camera = None
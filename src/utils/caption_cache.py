@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from .helpers import hash_distance
+
+# Bounded LRU cache of scene captions keyed by a 64-bit perceptual hash of the
+# frame. A lookup returns the caption of the closest cached frame when its
+# Hamming distance is within max_distance, so near-duplicate scenes skip BLIP.
+# The cache can persist to disk so frequently visited places are warm at
+# startup.
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+CAPTION_CACHE_PATH = os.path.join(MODELS_DIR, "caption_cache.json")
+
+class CaptionCache:
+    """Perceptual-hash keyed LRU caption cache with optional persistence"""
+
+    def __init__(self, capacity=256, max_distance=6, path=None):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.path = path
+        self.entries = OrderedDict()  # frame hash -> caption
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, frame_hash):
+        """Return the cached caption for a near-duplicate frame, or None"""
+        with self.lock:
+            best_hash, best_distance = None, self.max_distance + 1
+            for cached_hash in self.entries:
+                distance = hash_distance(cached_hash, frame_hash)
+                if distance < best_distance:
+                    best_hash, best_distance = cached_hash, distance
+                    if distance == 0:
+                        break
+
+            if best_hash is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(best_hash)
+            self.hits += 1
+            return self.entries[best_hash]
+
+    def store(self, frame_hash, caption):
+        """Add a caption, evicting the least recently used entry when full"""
+        with self.lock:
+            self.entries[frame_hash] = caption
+            self.entries.move_to_end(frame_hash)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def load(self):
+        """Load persisted captions from path (oldest first, so LRU order survives)"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            with self.lock:
+                for frame_hash, caption in data.get("entries", []):
+                    self.entries[int(frame_hash, 16)] = caption
+                while len(self.entries) > self.capacity:
+                    self.entries.popitem(last=False)
+                return len(self.entries)
+        except Exception as e:
+            print(f"[Caption Cache] Could not load {self.path}: {e}")
+            return 0
+
+    def save(self):
+        """Persist captions to path"""
+        if not self.path:
+            return
+        try:
+            with self.lock:
+                data = {"entries": [[f"{h:016x}", caption] for h, caption in self.entries.items()]}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Caption Cache] Could not save {self.path}: {e}")
+
+    def memory_bytes(self):
+        """Approximate memory held by cached keys and captions"""
+        with self.lock:
+            return sys.getsizeof(self.entries) + sum(
+                sys.getsizeof(h) + sys.getsizeof(caption) for h, caption in self.entries.items())
+
+    def stats(self):
+        """Hit ratio, size and memory use"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "memory_kb": round(self.memory_bytes() / 1024, 1),
+        }
+
+# Session-wide caption cache, persisted when ASSISTANT_CAPTION_CACHE is not "0"
+_caption_cache = None
+
+def get_caption_cache():
+    """Return the shared caption cache, loading it from disk on first use"""
+    global _caption_cache
+    if _caption_cache is None:
+        persist = os.environ.get("ASSISTANT_CAPTION_CACHE", "1") != "0"
+        _caption_cache = CaptionCache(path=CAPTION_CACHE_PATH if persist else None)
+        loaded = _caption_cache.load()
+        if loaded:
+            print(f"[Caption Cache] Loaded {loaded} cached captions.")
+    return _caption_cache
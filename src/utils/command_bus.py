@@ -0,0 +1,88 @@
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+from .metrics import metrics
+
+# One blocking queue for every way a user can give a command: typed lines
+# (read by a stdin thread), OpenCV window keys (posted by the display thread)
+# and voice commands. The menu and mode loops wait on it instead of
+# sleep-polling each source, so a command from any source is handled as soon
+# as it arrives.
+
+# Single-key shortcuts, for window keys and for one-letter typed lines (the
+# only keys available on headless units)
+SHORTCUTS = {
+    "q": "exit",  # Exit to main menu
+    "n": "nav",   # Navigation mode
+    "c": "cap",   # Captioning mode
+    "s": "sign",  # Sign detection mode
+    "m": "curr",  # Currency detection mode
+    "v": "voice", # Toggle voice command mode (handled separately)
+}
+
+# Commands a running mode acts on; other typed lines are reported and ignored
+MODE_COMMANDS = ("nav", "cap", "sign", "curr")
+COMMANDS = MODE_COMMANDS + ("exit", "voice")
+
+def key_command(key):
+    """Command for a key code from cv2.waitKey, or None"""
+    return SHORTCUTS.get(chr(key)) if 0 <= key < 256 else None
+
+class CommandBus:
+    """Merges keyboard, OpenCV key and voice commands into one queue"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.keyboard_thread = None
+        self.latencies = deque(maxlen=200)  # seconds between posting and handling a command
+
+    def post(self, command, source="internal"):
+        """Add a command (e.g. "nav", "exit") from the given source"""
+        self.queue.put((command, source, time.time()))
+
+    def wait(self, timeout=None):
+        """Return the next command, or None if none arrives within timeout seconds"""
+        try:
+            if timeout is not None and timeout <= 0:
+                command, source, posted = self.queue.get_nowait()
+            else:
+                command, source, posted = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.latencies.append(time.time() - posted)
+        metrics.observe(f"commands.latency.{source}", time.time() - posted)
+        return command
+
+    def poll(self):
+        """Return a pending command without blocking"""
+        return self.wait(0)
+
+    def clear(self):
+        """Drop pending commands (e.g. keys pressed before a prompt)"""
+        while self.poll() is not None:
+            pass
+
+    def start_keyboard(self):
+        """Read typed lines from stdin on a daemon thread"""
+        if self.keyboard_thread is None or not self.keyboard_thread.is_alive():
+            self.keyboard_thread = threading.Thread(target=self._read_keyboard, daemon=True)
+            self.keyboard_thread.start()
+
+    def _read_keyboard(self):
+        while True:
+            try:
+                line = sys.stdin.readline()
+            except Exception:
+                line = ""
+            if not line:
+                # stdin closed; behave like the old input() EOF and leave
+                self.post("exit", "keyboard")
+                return
+            line = line.strip().lower()
+            if line:
+                self.post(SHORTCUTS.get(line, line), "keyboard")
+
+command_bus = CommandBus()
@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+
+from .command_bus import command_bus, key_command
+from .metrics import metrics
+
+# Shows the modes' annotated frames on a separate thread. A mode hands over
+# its newest frame and moves straight on to the next one; the display thread
+# owns every HighGUI call (imshow, waitKey, destroyAllWindows), shows at most
+# DISPLAY_FPS frames a second, and posts window keys to the command bus.
+# A frame that arrives before the previous one of the same window was shown
+# replaces it. Several windows (one per stream with src/multi_stream.py) can
+# be shown at once; each keeps its own frame counts.
+#
+# In headless mode (units without a screen) nothing is drawn or shown and no
+# HighGUI call is made; commands come from typed input and voice only. "auto"
+# turns headless on for Linux sessions without an X11 or Wayland display.
+DISPLAY_FPS = float(os.environ.get("ASSISTANT_DISPLAY_FPS", "15"))
+HEADLESS = os.environ.get("ASSISTANT_HEADLESS", "auto")
+
+def no_display_available():
+    """True on Linux when there is no X11 or Wayland display to open windows on"""
+    return sys.platform.startswith("linux") and not (
+        os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def resolve_headless(setting):
+    """Turn a headless setting (bool, "1"/"0", "auto") into a bool"""
+    if isinstance(setting, bool):
+        return setting
+    setting = str(setting).strip().lower()
+    if setting == "auto":
+        return no_display_available()
+    return setting in ("1", "true", "yes", "on")
+
+class Display:
+    """Shows the latest frame of the running mode at a capped rate"""
+
+    def __init__(self, max_fps=DISPLAY_FPS, headless=HEADLESS):
+        self.configure(max_fps, headless)
+        self.cond = threading.Condition()
+        self.pending = {}              # window -> frame waiting to be shown
+        self.to_close = set()          # windows to destroy on the display thread
+        self.running = False
+        self.thread = None
+        # window -> [frames the mode produced since begin(), start time, shown,
+        #            skipped (replaced by a newer frame before being shown)]
+        self.counts = {}
+
+    def configure(self, max_fps=None, headless=None):
+        """Change the display rate cap and/or headless mode"""
+        if max_fps is not None:
+            self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        if headless is not None:
+            self.headless = resolve_headless(headless)
+
+    def begin(self, window):
+        """Start counting a window's frames (call before the mode's frame loop)"""
+        with self.cond:
+            self.counts[window] = [0, time.perf_counter(), 0, 0]
+
+    def show(self, window, frame):
+        """Hand a finished frame to the display thread (counted even when headless)"""
+        with self.cond:
+            counts = self.counts.setdefault(window, [0, time.perf_counter(), 0, 0])
+            counts[0] += 1
+            if self.headless:
+                return
+            if window in self.pending:
+                counts[3] += 1
+            self.pending[window] = frame
+            self.to_close.discard(window)
+            self.cond.notify()
+        if not self.running:
+            self.start()
+
+    def close_windows(self, window):
+        """Close a mode's window (call when the mode ends)"""
+        if self.headless or not self.running:
+            return
+        with self.cond:
+            self.pending.pop(window, None)
+            self.to_close.add(window)
+            self.cond.notify()
+
+    def summary(self, window):
+        """Frame rate of a window since begin(), and how many frames were shown"""
+        with self.cond:
+            frames, start, shown, skipped = self.counts.get(window, [0, None, 0, 0])
+        elapsed = time.perf_counter() - start if start else 0.0
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        if self.headless:
+            return f"{fps:.1f} FPS over {frames} frames (headless)"
+        return f"{fps:.1f} FPS over {frames} frames, {shown} shown, {skipped} skipped by the display"
+
+    def start(self):
+        """Start the display thread"""
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        # Imported here so the menu can start before OpenCV is loaded
+        import cv2
+        next_show = 0.0
+        while True:
+            with self.cond:
+                self.cond.wait_for(
+                    lambda: self.pending or self.to_close or not self.running,
+                    timeout=0.05)
+                if not self.running:
+                    break
+                items, close = {}, self.to_close
+                if time.perf_counter() >= next_show:
+                    items, self.pending = self.pending, {}
+                    for window in items:
+                        self.counts[window][2] += 1
+                self.to_close = set()
+
+            for window in close:
+                try:
+                    cv2.destroyWindow(window)
+                except cv2.error:
+                    pass  # never shown
+            if close and not self.pending:
+                next_show = 0.0
+            if items:
+                for window, frame in items.items():
+                    with metrics.timer("display.imshow"):
+                        cv2.imshow(window, frame)
+                next_show = time.perf_counter() + self.interval
+
+            # waitKey both handles window events and waits out the rate cap
+            delay_ms = max(1, int(1000 * (next_show - time.perf_counter())))
+            command = key_command(cv2.waitKey(min(delay_ms, 50)) & 0xFF)
+            if command:
+                command_bus.post(command, "key")
+
+        cv2.destroyAllWindows()
+
+    def stop(self):
+        """Stop the display thread and close its windows"""
+        with self.cond:
+            if not self.running:
+                return
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=2.0)
+
+display = Display()
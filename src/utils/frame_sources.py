@@ -0,0 +1,169 @@
+import abc
+import os
+import time
+
+import cv2
+import numpy as np
+
+from .camera import get_camera
+
+# Frame sources the modes read from instead of a hard-coded camera index.
+# All of them follow the cv2.VideoCapture read()/isOpened()/release() API.
+# Sources that can run out set `finished` once their last frame is read so
+# a mode loop can stop instead of waiting for a camera that never comes.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+class FrameSource(abc.ABC):
+    """Base class for finite frame sources with optional real-time pacing"""
+
+    def __init__(self, fps=30.0, realtime=True, loop=False):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self.frames_read = 0
+        self.start_time = None
+
+    @abc.abstractmethod
+    def _next_frame(self):
+        """Return the next frame or None at the end of the stream"""
+
+    @abc.abstractmethod
+    def _rewind(self):
+        """Restart the stream from the first frame (for looping)"""
+
+    def isOpened(self):
+        return not self.finished
+
+    def read(self):
+        if self.finished:
+            return False, None
+
+        frame = self._next_frame()
+        if frame is None and self.loop and self.frames_read > 0:
+            self._rewind()
+            frame = self._next_frame()
+        if frame is None:
+            self.finished = True
+            return False, None
+
+        if self.start_time is None:
+            self.start_time = time.time()
+        if self.realtime:
+            # Hold each frame until its presentation time
+            due = self.start_time + self.frames_read / self.fps
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        self.finished = True
+
+class VideoFileSource(FrameSource):
+    """Frames from a video file, paced at the file's own frame rate"""
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), realtime, loop)
+        if not self.cap.isOpened():
+            print(f"[Frame Source] Cannot open video file: {path}")
+            self.finished = True
+
+    def _next_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+class ImageDirectorySource(FrameSource):
+    """Frames from the images in a directory, in file-name order"""
+
+    def __init__(self, path, fps=10.0, realtime=True, loop=False):
+        super().__init__(fps, realtime, loop)
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.index = 0
+        if not self.paths:
+            print(f"[Frame Source] No images found in {path}")
+            self.finished = True
+
+    def _next_frame(self):
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return frame
+            print(f"[Frame Source] Skipping unreadable image: {self.paths[self.index - 1]}")
+        return None
+
+    def _rewind(self):
+        self.index = 0
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames: moving boxes over a noisy background"""
+
+    def __init__(self, width=640, height=480, num_frames=300, fps=30.0,
+                 realtime=False, loop=False, seed=0):
+        super().__init__(fps, realtime, loop)
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames
+        self.index = 0
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+        self.boxes = [
+            (rng.integers(0, width), rng.integers(0, height),
+             int(rng.integers(40, 160)), int(rng.integers(40, 160)),
+             tuple(int(c) for c in rng.integers(80, 255, 3)),
+             rng.uniform(-4, 4), rng.uniform(-3, 3))
+            for _ in range(4)
+        ]
+
+    def _next_frame(self):
+        if self.num_frames is not None and self.index >= self.num_frames:
+            return None
+        frame = self.background.copy()
+        for x, y, w, h, color, dx, dy in self.boxes:
+            x1 = int(x + dx * self.index) % self.width
+            y1 = int(y + dy * self.index) % self.height
+            cv2.rectangle(frame, (x1, y1), (x1 + w, y1 + h), color, -1)
+        self.index += 1
+        return frame
+
+    def _rewind(self):
+        self.index = 0
+
+def open_frame_source(spec="camera", realtime=True, loop=False):
+    """Open a frame source from a spec string
+
+    Specs: "camera" or "camera:<index>" for the shared live camera, a path
+    to a video file, a path to a directory of images, or
+    "synthetic[:WIDTHxHEIGHT[:FRAMES]]" for generated frames.
+    """
+    if spec is None or spec == "camera" or spec.startswith("camera:"):
+        device = int(spec.split(":", 1)[1]) if spec and ":" in spec else 0
+        return get_camera(device)
+
+    if spec == "synthetic" or spec.startswith("synthetic:"):
+        parts = spec.split(":")
+        width, height, num_frames = 640, 480, 300
+        if len(parts) > 1 and parts[1]:
+            width, height = (int(v) for v in parts[1].lower().split("x"))
+        if len(parts) > 2 and parts[2]:
+            num_frames = int(parts[2])
+        return SyntheticSource(width, height, num_frames, realtime=realtime, loop=loop)
+
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
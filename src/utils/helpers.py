@@ -0,0 +1,110 @@
+import time
+
+import cv2
+import numpy as np
+
+THUMBNAIL_SIZE = (64, 48)  # (width, height)
+
+def frame_thumbnail(frame, size=THUMBNAIL_SIZE):
+    """Return a small grayscale copy of a frame for cheap frame comparisons"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+def motion_energy(prev_thumb, thumb):
+    """Mean absolute difference between two thumbnails, scaled to 0-1"""
+    return float(cv2.absdiff(prev_thumb, thumb).mean()) / 255.0
+
+def estimate_global_shift(prev_thumb, thumb, min_response=0.1):
+    """Estimate the global translation (dx, dy) of thumb relative to prev_thumb
+
+    Uses phase correlation, so the result is in thumbnail pixels. Returns
+    (0, 0) when the correlation peak is too weak to trust.
+    """
+    (dx, dy), response = cv2.phaseCorrelate(np.float32(prev_thumb), np.float32(thumb))
+    if response < min_response:
+        return 0.0, 0.0
+    return dx, dy
+
+def extract_detections(results, min_conf=0.5):
+    """Pull all boxes out of YOLO results as arrays
+
+    Returns (boxes, confs, cls_ids): an (N, 4) int array of x1, y1, x2, y2
+    frame coordinates, plus matching confidence and class id arrays, keeping
+    only detections with confidence >= min_conf.
+    """
+    boxes = results.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), dtype=int), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=int)
+
+    xyxy = boxes.xyxy.cpu().numpy()
+    confs = boxes.conf.cpu().numpy()
+    cls_ids = boxes.cls.cpu().numpy().astype(int)
+
+    keep = confs >= min_conf
+    return xyxy[keep].astype(int), confs[keep], cls_ids[keep]
+
+def perceptual_hash(frame, hash_size=8):
+    """64-bit difference hash (dHash) of a frame or thumbnail, as an int"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hash_distance(hash_a, hash_b):
+    """Hamming distance between two perceptual hashes"""
+    return bin(hash_a ^ hash_b).count("1")
+
+class SceneChangeGate:
+    """Tell a mode whether a frame changed enough to be worth re-inferring
+
+    Each frame is reduced to a thumbnail and a perceptual hash and compared
+    with the last frame that was inferred. The frame passes the gate when the
+    motion energy or hash distance crosses its threshold, or when max_age
+    seconds have passed so static scenes are still re-checked now and then.
+    """
+
+    def __init__(self, motion_threshold=0.03, hash_threshold=6, max_age=3.0):
+        self.motion_threshold = motion_threshold
+        self.hash_threshold = hash_threshold
+        self.max_age = max_age
+        self.reference_thumb = None
+        self.reference_hash = None
+        self.reference_time = 0.0
+        self.checks = 0
+        self.skips = 0
+
+    def should_infer(self, frame, now=None, thumb=None):
+        """Return True when the frame should be inferred, False to reuse the last result
+
+        thumb may be passed when frame_thumbnail(frame) was already computed.
+        """
+        now = time.time() if now is None else now
+        self.checks += 1
+        thumb = frame_thumbnail(frame) if thumb is None else thumb
+        frame_hash = perceptual_hash(thumb)
+
+        changed = (
+            self.reference_thumb is None
+            or now - self.reference_time > self.max_age
+            or motion_energy(self.reference_thumb, thumb) > self.motion_threshold
+            or hash_distance(self.reference_hash, frame_hash) > self.hash_threshold
+        )
+        if changed:
+            self.reference_thumb = thumb
+            self.reference_hash = frame_hash
+            self.reference_time = now
+        else:
+            self.skips += 1
+        return changed
+
+    def reset(self):
+        """Force the next frame through the gate"""
+        self.reference_thumb = None
+
+    @property
+    def skip_rate(self):
+        return self.skips / self.checks if self.checks else 0.0
+
+    def summary(self):
+        """One-line description of how much inference the gate saved"""
+        return f"skipped {self.skips} of {self.checks} frames ({100 * self.skip_rate:.0f}%)"
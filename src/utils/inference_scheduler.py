@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+
+# Inference scheduler for serving several camera streams from one process.
+# Each registered model gets a worker thread that collects requests from all
+# streams into micro-batches: it waits for the first request, then keeps
+# collecting until max_batch_size items are queued or max_wait_ms has passed,
+# and runs the model once on the whole batch. Results go back to each
+# stream's caller through a Future.
+
+class InferenceScheduler:
+    """Dynamic micro-batching across streams, one worker per model"""
+
+    def __init__(self, max_batch_size=4, max_wait_ms=10, latency_window=500):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.models = {}  # name -> dict(batch_fn, queue, thread, settings, counters)
+        self.running = True
+        self.lock = threading.Lock()
+        # Per-stream request latency (submit to result), in seconds
+        self.latencies = defaultdict(lambda: deque(maxlen=latency_window))
+
+    def register(self, name, batch_fn, max_batch_size=None, max_wait_ms=None):
+        """Register a model; batch_fn takes a list of inputs and returns a list of outputs"""
+        entry = {
+            "batch_fn": batch_fn,
+            "queue": queue.Queue(),
+            "max_batch_size": max_batch_size or self.max_batch_size,
+            "max_wait": (self.max_wait_ms if max_wait_ms is None else max_wait_ms) / 1000.0,
+            "batches": 0,
+            "items": 0,
+        }
+        entry["thread"] = threading.Thread(target=self._worker, args=(name, entry),
+                                           name=f"scheduler-{name}", daemon=True)
+        self.models[name] = entry
+        entry["thread"].start()
+
+    def submit(self, name, item, stream_id=None):
+        """Queue one input for a model and return a Future for its output"""
+        if not self.running:
+            raise RuntimeError("Inference scheduler is stopped")
+        future = Future()
+        self.models[name]["queue"].put((item, stream_id, time.perf_counter(), future))
+        return future
+
+    def infer(self, name, item, stream_id=None):
+        """Blocking helper: submit one input and wait for its output"""
+        return self.submit(name, item, stream_id).result()
+
+    def _worker(self, name, entry):
+        requests = entry["queue"]
+        while self.running:
+            try:
+                first = requests.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.perf_counter() + entry["max_wait"]
+            while len(batch) < entry["max_batch_size"]:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.running = False
+                    break
+                batch.append(request)
+
+            self._run_batch(name, entry, batch)
+
+        # Fail anything still queued so callers do not hang
+        while True:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request[3].set_exception(RuntimeError("Inference scheduler stopped"))
+
+    def _run_batch(self, name, entry, batch):
+        items = [request[0] for request in batch]
+        try:
+            outputs = entry["batch_fn"](items)
+            if len(outputs) != len(items):
+                raise RuntimeError(f"{name} returned {len(outputs)} outputs for {len(items)} inputs")
+        except Exception as e:
+            print(f"[Scheduler] Error running {name} batch: {e}")
+            for request in batch:
+                request[3].set_exception(e)
+            return
+
+        done = time.perf_counter()
+        with self.lock:
+            entry["batches"] += 1
+            entry["items"] += len(batch)
+            for (_, stream_id, submitted, _), output in zip(batch, outputs):
+                self.latencies[stream_id].append(done - submitted)
+        for request, output in zip(batch, outputs):
+            request[3].set_result(output)
+
+    def stats(self):
+        """Per-model batch sizes and per-stream latency (ms)"""
+        with self.lock:
+            models = {
+                name: {
+                    "batches": entry["batches"],
+                    "items": entry["items"],
+                    "avg_batch_size": round(entry["items"] / entry["batches"], 2) if entry["batches"] else 0.0,
+                }
+                for name, entry in self.models.items()
+            }
+            streams = {}
+            for stream_id, samples in self.latencies.items():
+                ordered = sorted(samples)
+                if not ordered:
+                    continue
+                streams[stream_id] = {
+                    "requests": len(ordered),
+                    "mean_ms": round(1000 * sum(ordered) / len(ordered), 2),
+                    "p95_ms": round(1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+                }
+        return {"models": models, "streams": streams}
+
+    def stop(self):
+        """Stop all workers; pending requests fail with RuntimeError"""
+        self.running = False
+        for entry in self.models.values():
+            entry["queue"].put(None)
+        for entry in self.models.values():
+            entry["thread"].join(timeout=2)
@@ -0,0 +1,33 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+# Console messages from code that also runs in the background. Work done
+# inside quiet() (the menu's model preloader) goes to the "assistant" logger
+# instead of printing over the menu prompt; set ASSISTANT_LOG_LEVEL=INFO to
+# see it. Everywhere else log() prints as before.
+LOG_LEVEL = os.environ.get("ASSISTANT_LOG_LEVEL")
+
+logger = logging.getLogger("assistant")
+if LOG_LEVEL:
+    logging.basicConfig(level=LOG_LEVEL.upper(), format="%(message)s")
+
+_local = threading.local()
+
+def log(message):
+    """Print a message, or log it when this thread is running quietly"""
+    if getattr(_local, "quiet", False):
+        logger.info(message)
+    else:
+        print(message)
+
+@contextmanager
+def quiet():
+    """Send this thread's log() messages to the logger inside the with block"""
+    previous = getattr(_local, "quiet", False)
+    _local.quiet = True
+    try:
+        yield
+    finally:
+        _local.quiet = previous
@@ -0,0 +1,249 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Built-in timing for field units. Stages of every mode, the speech thread and
+# the voice thread record their latencies here as rolling log-linear (HDR
+# style) histograms; counters track frames, drops and speech events. A
+# snapshot (p50/p95/p99 per timer, counters and their rates) can be written
+# periodically as JSON lines and served as text on a local HTTP port:
+#
+#     python src/main.py --metrics-file metrics.jsonl --metrics-port 9100
+#     curl http://127.0.0.1:9100/metrics
+#
+# Recording a value costs a frexp, an index and a lock, so timers can stay on
+# in production.
+METRICS_FILE = os.environ.get("ASSISTANT_METRICS_FILE")
+METRICS_PORT = os.environ.get("ASSISTANT_METRICS_PORT")
+METRICS_INTERVAL = float(os.environ.get("ASSISTANT_METRICS_INTERVAL", "10"))
+
+class LatencyHistogram:
+    """Rolling log-linear histogram of durations
+
+    Values between 1 µs and ~1 hour fall into SUB_BUCKETS linear buckets per
+    power of two, so any percentile is within ~3% of the true value. Two
+    windows are kept and the older one is dropped every window seconds, so
+    percentiles describe the last one to two windows.
+    """
+
+    SUB_BUCKETS = 32
+    MIN_VALUE = 1e-6
+    OCTAVES = 32
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self.current = [0] * (self.SUB_BUCKETS * self.OCTAVES)
+        self.previous = [0] * len(self.current)
+        self.window_start = time.monotonic()
+        self.count = 0          # all-time count and sum, for means and rates
+        self.total = 0.0
+        self.max = 0.0          # max over the current windows
+        self.lock = threading.Lock()
+
+    def _index(self, seconds):
+        mantissa, exponent = math.frexp(max(seconds, self.MIN_VALUE) / self.MIN_VALUE)
+        # mantissa is in [0.5, 1): map it linearly onto the sub-buckets of the octave
+        octave = min(exponent - 1, self.OCTAVES - 1)
+        sub = min(int((mantissa - 0.5) * 2 * self.SUB_BUCKETS), self.SUB_BUCKETS - 1)
+        return octave * self.SUB_BUCKETS + sub
+
+    def _value(self, index):
+        """Midpoint (seconds) of a bucket"""
+        octave, sub = divmod(index, self.SUB_BUCKETS)
+        return self.MIN_VALUE * 2 ** octave * (1 + (sub + 0.5) / self.SUB_BUCKETS)
+
+    def _rotate(self, now):
+        if now - self.window_start >= self.window:
+            expired = now - self.window_start >= 2 * self.window
+            self.previous = [0] * len(self.current) if expired else self.current
+            self.current = [0] * len(self.previous)
+            self.window_start = now
+            self.max = 0.0
+
+    def record(self, seconds):
+        index = self._index(seconds)
+        with self.lock:
+            self._rotate(time.monotonic())
+            self.current[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        """Values (seconds) at each quantile over the recent windows, None when empty"""
+        with self.lock:
+            self._rotate(time.monotonic())
+            counts = [a + b for a, b in zip(self.current, self.previous)]
+        total = sum(counts)
+        if not total:
+            return [None] * len(quantiles)
+        results, seen, index = [], 0, 0
+        for q in sorted(quantiles):
+            target = max(1, math.ceil(q * total))
+            while seen + counts[index] < target:
+                seen += counts[index]
+                index += 1
+            results.append(self._value(index))
+        return results
+
+class Metrics:
+    """Named latency histograms and counters shared by the whole process"""
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self.histograms = {}
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last_snapshot = (time.time(), Counter())  # for counter rates
+
+    def observe(self, name, seconds):
+        """Record one duration in seconds"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram(self.window))
+        histogram.record(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Time the body of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def count(self, name, amount=1):
+        """Add to a counter (frames, drops, events)"""
+        with self.lock:
+            self.counters[name] += amount
+
+    def snapshot(self, advance=True):
+        """Percentiles of every timer, counters, and counter rates since the last snapshot
+
+        advance=False leaves the baseline for rates alone (for on-demand reads
+        that should not disturb the periodic export).
+        """
+        now = time.time()
+        with self.lock:
+            histograms = dict(self.histograms)
+            counters = Counter(self.counters)
+            then, previous = self.last_snapshot
+            if advance:
+                self.last_snapshot = (now, counters)
+        latency = {}
+        for name, histogram in sorted(histograms.items()):
+            p50, p95, p99 = histogram.percentiles()
+            if p50 is None:
+                continue
+            latency[name] = {
+                "count": histogram.count,
+                "mean_ms": round(1000 * histogram.total / histogram.count, 3),
+                "p50_ms": round(1000 * p50, 3),
+                "p95_ms": round(1000 * p95, 3),
+                "p99_ms": round(1000 * p99, 3),
+                "max_ms": round(1000 * histogram.max, 3),
+            }
+        elapsed = now - then
+        rates = {name: round((value - previous[name]) / elapsed, 2)
+                 for name, value in sorted(counters.items()) if elapsed > 0}
+        return {
+            "time": round(now, 3),
+            "uptime_s": round(now - self.started, 1),
+            "latency": latency,
+            "counters": dict(sorted(counters.items())),
+            "rates_per_s": rates,
+        }
+
+    def format_text(self, snapshot=None):
+        """A snapshot as aligned plain text lines"""
+        snapshot = snapshot or self.snapshot(advance=False)
+        lines = [f"# uptime {snapshot['uptime_s']} s"]
+        for name, stats in snapshot["latency"].items():
+            lines.append(f"{name:32s} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+                         f"p99={stats['p99_ms']}ms max={stats['max_ms']}ms count={stats['count']}")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:32s} {value} ({snapshot['rates_per_s'].get(name, 0)}/s)")
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Writes metric snapshots as JSON lines and serves them on a local port"""
+
+    def __init__(self, registry, path=METRICS_FILE, port=METRICS_PORT, interval=METRICS_INTERVAL):
+        self.registry = registry
+        self.path = path
+        self.port = int(port) if port else None
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.server = None
+
+    def start(self):
+        """Start the export thread and the HTTP endpoint (each only if configured)"""
+        if self.path:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        if self.port:
+            self._serve()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.export()
+
+    def export(self):
+        """Append one snapshot to the JSON lines file"""
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(self.registry.snapshot()) + "\n")
+        except Exception as e:
+            print(f"[Metrics] Could not write {self.path}: {e}")
+
+    def _serve(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, kind = registry.format_text(), "text/plain"
+                elif self.path == "/metrics.json":
+                    body, kind = json.dumps(registry.snapshot(advance=False)), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", f"{kind}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # keep the console for the assistant
+
+        try:
+            # Local only: the endpoint is for profiling on the unit itself or over SSH
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        except OSError as e:
+            print(f"[Metrics] Could not listen on port {self.port}: {e}")
+            return
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"[Metrics] Serving http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        """Stop exporting, writing a final snapshot"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.export()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+metrics = Metrics()
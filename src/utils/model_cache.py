@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .log import log
+
+# Shared registry that keeps loaded models warm across mode switches.
+# Entries are evicted least-recently-used first when the estimated size of
+# everything cached would exceed the memory budget.
+DEFAULT_BUDGET_MB = int(os.environ.get("ASSISTANT_MODEL_CACHE_MB", "3072"))
+
+_cache = OrderedDict()  # name -> (models, size_bytes)
+_cache_lock = threading.RLock()
+_budget_bytes = DEFAULT_BUDGET_MB * 1024 * 1024
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": 0.0}
+_recording = threading.local()  # .names: models looked up by this thread in record_models()
+                                # .cancel_event: set to abort this thread's loads (cancellable_loads())
+
+class LoadCancelled(Exception):
+    """Raised instead of starting a load once the thread's cancel event is set"""
+
+def set_model_cache_budget(budget_mb):
+    """Set the RAM budget (in MB) for cached models and evict to fit it"""
+    global _budget_bytes
+    with _cache_lock:
+        _budget_bytes = int(budget_mb * 1024 * 1024)
+        _evict_to_fit(0)
+
+def get_model_cache_budget():
+    """Return the RAM budget for cached models in bytes"""
+    return _budget_bytes
+
+def estimate_model_size(model):
+    """Estimate the in-memory size of a loaded model in bytes"""
+    # Tuples/lists of models (e.g. BLIP processor + model) are summed
+    if isinstance(model, (tuple, list)):
+        return sum(estimate_model_size(m) for m in model)
+
+    # PyTorch modules (BLIP, raw torch models). Wrappers that are modules
+    # themselves (ultralytics YOLO) report no parameters for exported models
+    # and fall through to their .model.
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):
+        try:
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            size += sum(b.numel() * b.element_size() for b in model.buffers())
+            if size:
+                return size
+        except Exception:
+            pass
+
+    # Wrappers (ultralytics YOLO, the currency classifier) hold the real model in .model
+    inner = getattr(model, "model", None)
+    # Exported (ONNX/TFLite) models may only hold the path to their weights
+    if isinstance(inner, str):
+        return os.path.getsize(inner) if os.path.isfile(inner) else 0
+    if inner is not None and inner is not model:
+        return estimate_model_size(inner)
+
+    # Keras models
+    if hasattr(model, "count_params"):
+        try:
+            return int(model.count_params()) * 4
+        except Exception:
+            pass
+
+    return 0
+
+def _current_usage():
+    return sum(size for _, size in _cache.values())
+
+def _evict_to_fit(incoming_bytes):
+    """Evict least-recently-used entries until incoming_bytes fits the budget"""
+    while _cache and _current_usage() + incoming_bytes > _budget_bytes:
+        name, _ = _cache.popitem(last=False)
+        _stats["evictions"] += 1
+        log(f"[Model Cache] Evicted {name} to stay within memory budget.")
+
+def get_model(name, loader, size_bytes=None):
+    """Return the cached model for name, calling loader() on a miss
+
+    size_bytes may be given when the size is known up front (e.g. the weight
+    file size); otherwise it is estimated from the loaded model. Inside
+    cancellable_loads() a miss raises LoadCancelled once the event is set.
+    """
+    names = getattr(_recording, "names", None)
+    if names is not None:
+        names.append(name)
+    with _cache_lock:
+        if name in _cache:
+            _cache.move_to_end(name)
+            _stats["hits"] += 1
+            return _cache[name][0]
+        _stats["misses"] += 1
+
+    raise_if_cancelled()
+    # Load outside the lock so a slow load does not block other lookups
+    start = time.time()
+    models = loader()
+    elapsed = time.time() - start
+
+    with _cache_lock:
+        _stats["load_seconds"] += elapsed
+        if name in _cache:
+            # Another thread finished loading first; keep its copy
+            _cache.move_to_end(name)
+            return _cache[name][0]
+
+        size = size_bytes if size_bytes is not None else estimate_model_size(models)
+        if size > _budget_bytes:
+            log(f"[Model Cache] {name} ({size / 2**20:.0f} MB) exceeds the cache budget; not caching.")
+            return models
+
+        _evict_to_fit(size)
+        _cache[name] = (models, size)
+    return models
+
+@contextmanager
+def record_models():
+    """Collect the names of the models this thread looks up inside the with block
+
+    Lookups by other threads are not included, so a caller can tell which
+    cache entries its own loader used while other loads run concurrently.
+    """
+    previous = getattr(_recording, "names", None)
+    _recording.names = []
+    try:
+        yield _recording.names
+    finally:
+        _recording.names = previous
+
+@contextmanager
+def cancellable_loads(cancel_event):
+    """Abort this thread's model loads once cancel_event is set
+
+    A load that has already started runs to completion, but a loader that
+    fetches several models (or exports one first) stops before the next.
+    """
+    previous = getattr(_recording, "cancel_event", None)
+    _recording.cancel_event = cancel_event
+    try:
+        yield
+    finally:
+        _recording.cancel_event = previous
+
+def raise_if_cancelled():
+    """Raise LoadCancelled if this thread's loads have been cancelled"""
+    cancel_event = getattr(_recording, "cancel_event", None)
+    if cancel_event is not None and cancel_event.is_set():
+        raise LoadCancelled()
+
+def is_model_cached(name):
+    """Check whether a model is currently held in the cache"""
+    with _cache_lock:
+        return name in _cache
+
+def evict_model(name):
+    """Drop a single model from the cache"""
+    with _cache_lock:
+        if _cache.pop(name, None) is not None:
+            _stats["evictions"] += 1
+            return True
+    return False
+
+def clear_model_cache():
+    """Drop every cached model"""
+    with _cache_lock:
+        _cache.clear()
+
+def get_model_cache_stats():
+    """Return hit/miss/eviction counters and current memory usage"""
+    with _cache_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "evictions": _stats["evictions"],
+            "hit_ratio": _stats["hits"] / lookups if lookups else 0.0,
+            "load_seconds": round(_stats["load_seconds"], 3),
+            "models": list(_cache.keys()),
+            "model_bytes": {name: size for name, (_, size) in _cache.items()},
+            "used_mb": round(_current_usage() / 2**20, 1),
+            "budget_mb": round(_budget_bytes / 2**20, 1),
+        }
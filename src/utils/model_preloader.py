@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from .log import log, quiet
+from .model_cache import LoadCancelled, cancellable_loads, get_model_cache_stats, record_models
+
+# Warms the models of the mode the user is most likely to pick next while the
+# main menu waits for a command. Candidates are ranked by how often each mode
+# followed the previous one in the recorded history, then by overall use,
+# then by the default order. A mode is only preloaded when its expected size
+# fits under the memory ceiling without evicting anything from the model
+# cache, and preloading stops as soon as a mode is chosen: a claim for
+# another mode aborts the in-flight load before its next model. Loader output
+# goes through log() quietly so it does not print over the menu prompt.
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+HISTORY_PATH = os.path.join(MODELS_DIR, "mode_history.json")
+DEFAULT_ORDER = tuple(os.environ.get("ASSISTANT_PRELOAD_ORDER", "nav,sign,curr,cap").split(","))
+PRELOAD_CEILING_MB = os.environ.get("ASSISTANT_PRELOAD_MB")  # defaults to the model cache budget
+
+def path_size(path):
+    """Size in bytes of a file, or of every file under a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+class ModelPreloader:
+    """Loads the most likely next mode's models on a background thread"""
+
+    def __init__(self, loaders, size_hints=None, default_order=DEFAULT_ORDER,
+                 ceiling_mb=PRELOAD_CEILING_MB, history_path=HISTORY_PATH,
+                 history_size=50, max_modes=2):
+        self.loaders = loaders                 # mode -> callable that loads its models
+        self.size_hints = size_hints or {}     # mode -> callable returning estimated bytes
+        self.default_order = [mode for mode in default_order if mode in loaders]
+        self.ceiling_mb = float(ceiling_mb) if ceiling_mb else None
+        self.history_path = history_path
+        self.history_size = history_size
+        self.max_modes = max_modes
+        self.history = []
+        self.sizes = {}                        # mode -> measured bytes of its cached models
+        self.warm = set()                      # modes whose models should be cached
+        self.preloaded = set()                 # modes warmed by the preloader, not yet entered
+        self.evictions_seen = 0
+        self.loading = None
+        self.cancel_event = threading.Event()   # set on claim: start nothing further
+        self.abort_event = threading.Event()    # set on claim of another mode: abort the load
+        self.done = threading.Condition()
+        self.thread = None
+        self.stats = Counter()
+        self._load_history()
+
+    def _load_history(self):
+        if not self.history_path or not os.path.exists(self.history_path):
+            return
+        try:
+            with open(self.history_path) as f:
+                data = json.load(f)
+            self.history = [mode for mode in data.get("history", []) if mode in self.loaders]
+            self.sizes = {mode: int(size) for mode, size in data.get("sizes", {}).items()}
+        except Exception as e:
+            print(f"[Preloader] Could not load {self.history_path}: {e}")
+
+    def save(self):
+        """Persist the mode history and measured model sizes"""
+        if not self.history_path:
+            return
+        try:
+            tmp_path = self.history_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"history": self.history[-self.history_size:], "sizes": self.sizes}, f)
+            os.replace(tmp_path, self.history_path)
+        except Exception as e:
+            print(f"[Preloader] Could not save {self.history_path}: {e}")
+
+    def record(self, mode):
+        """Note that mode was entered (its models are loaded by the mode itself)"""
+        if mode not in self.loaders:
+            return
+        self.history.append(mode)
+        del self.history[:-self.history_size]
+        with self.done:
+            self.warm.add(mode)
+
+    def predict(self):
+        """Modes ranked from most to least likely to be picked next"""
+        last = self.history[-1] if self.history else None
+        followers = Counter(b for a, b in zip(self.history, self.history[1:]) if a == last)
+        overall = Counter(self.history)
+        return sorted(self.default_order, key=lambda mode: (
+            -followers[mode], -overall[mode], self.default_order.index(mode)))
+
+    def _ceiling_bytes(self, stats):
+        ceiling_mb = self.ceiling_mb if self.ceiling_mb is not None else stats["budget_mb"]
+        return min(ceiling_mb, stats["budget_mb"]) * 2**20
+
+    def _expected_size(self, mode):
+        if mode in self.sizes:
+            return self.sizes[mode]
+        hint = self.size_hints.get(mode)
+        try:
+            return hint() if hint else 0
+        except Exception:
+            return 0
+
+    def start(self):
+        """Start warming likely modes in the background (call when the menu opens)"""
+        self.cancel_event.clear()
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        with quiet(), cancellable_loads(self.abort_event):
+            self._preload()
+
+    def _preload(self):
+        stats = get_model_cache_stats()
+        with self.done:
+            # Anything evicted since we last looked may no longer be warm
+            if stats["evictions"] != self.evictions_seen:
+                self.evictions_seen = stats["evictions"]
+                self.warm.clear()
+
+        for mode in self.predict()[:self.max_modes]:
+            if self.cancel_event.is_set():
+                self.stats["cancelled"] += 1
+                return
+            with self.done:
+                if mode in self.warm:
+                    continue
+
+            stats = get_model_cache_stats()
+            used = stats["used_mb"] * 2**20
+            if used + self._expected_size(mode) > self._ceiling_bytes(stats):
+                self.stats["skipped_memory"] += 1
+                continue
+
+            with self.done:
+                if self.cancel_event.is_set():
+                    self.stats["cancelled"] += 1
+                    return
+                self.loading = mode
+                self.abort_event.clear()
+            start = time.time()
+            try:
+                with record_models() as names:
+                    self.loaders[mode]()
+                # Sized from the entries this mode's loader looked up, not the change in
+                # total usage, which would include loads by other threads meanwhile
+                after = get_model_cache_stats()
+                sizes = after["model_bytes"]
+                if names and all(name in sizes for name in names):
+                    self.sizes[mode] = sum(sizes[name] for name in set(names))
+                with self.done:
+                    self.warm.add(mode)
+                    self.preloaded.add(mode)
+                    self.evictions_seen = after["evictions"]
+                self.stats["preloaded"] += 1
+                log(f"[Preloader] Warmed {mode} in {time.time() - start:.1f}s.")
+            except LoadCancelled:
+                self.stats["cancelled"] += 1
+                log(f"[Preloader] Stopped preloading {mode}; another mode was chosen.")
+                return
+            except Exception as e:
+                log(f"[Preloader] Could not preload {mode}: {e}")
+            finally:
+                with self.done:
+                    self.loading = None
+                    self.done.notify_all()
+
+    def claim(self, mode, timeout=None):
+        """Stop preloading because mode was chosen
+
+        If mode itself is loading, wait for it so the mode does not load the
+        same models again; a different in-flight load stops before its next
+        model (one already loading finishes) and nothing further is started.
+        """
+        with self.done:
+            self.cancel_event.set()
+            if self.loading is not None and self.loading != mode:
+                self.abort_event.set()
+            if mode in self.preloaded or self.loading == mode:
+                self.stats["hits"] += 1
+            self.preloaded.discard(mode)
+            if self.loading == mode:
+                self.done.wait_for(lambda: self.loading != mode, timeout)
+
+    def summary(self):
+        """Short description of preloader activity"""
+        return (f"{self.stats['preloaded']} preloaded, {self.stats['hits']} used, "
+                f"{self.stats['skipped_memory']} skipped for memory, {self.stats['cancelled']} cancelled")
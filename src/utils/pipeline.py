@@ -0,0 +1,266 @@
+import threading
+import time
+from collections import deque
+
+from .command_bus import command_bus, COMMANDS, SHORTCUTS
+from .display import display
+from .metrics import metrics
+from .ui import add_controls_overlay
+
+# Runtime shared by the assistant modes. A mode declares its per-frame work as
+# stages (typically preprocess -> infer -> postprocess -> announce -> render)
+# and ModePipeline runs capture and each stage on its own thread, with a
+# bounded queue in front of every stage. While one stage works on frame k the
+# stage before it already works on frame k+1.
+#
+# Each queue has a policy for when it is full:
+#   BLOCK       - the upstream stage waits (backpressure)
+#   DROP_OLDEST - the waiting frame is replaced by the new one (freshest wins)
+#   DROP_NEWEST - the new frame is discarded
+# Sources that are not paced in real time (recordings read with --fast,
+# benchmarks) always use BLOCK, so every frame is processed.
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+_END = object()  # end of stream marker, passed through every stage
+
+class FrameContext:
+    """A captured frame and whatever the stages computed for it"""
+
+    def __init__(self, frame, index):
+        self.frame = frame
+        self.index = index
+        self.captured_at = time.time()
+
+class Stage:
+    """One step of a mode pipeline
+
+    func(ctx) updates the FrameContext in place and may return False to drop
+    the frame from the remaining stages. queue_size and policy describe the
+    queue in front of the stage. draw_only stages are skipped when headless.
+    """
+
+    def __init__(self, name, func, queue_size=1, policy=BLOCK, draw_only=False):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {POLICIES}")
+        self.name = name
+        self.func = func
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.draw_only = draw_only
+        self.processed = 0
+        self.seconds = 0.0
+
+class StageQueue:
+    """Bounded queue between two stages, applying the stage's full-queue policy"""
+
+    def __init__(self, maxsize, policy, drop_counter=None):
+        self.items = deque()
+        self.drop_counter = drop_counter  # metrics counter for dropped frames
+        self.maxsize = maxsize
+        self.policy = policy
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Queue item (subject to the policy); returns False once the queue is closed"""
+        with self.cond:
+            if item is not _END and len(self.items) >= self.maxsize:
+                if self.policy == BLOCK:
+                    self.cond.wait_for(lambda: len(self.items) < self.maxsize or self.closed)
+                elif self.policy == DROP_OLDEST:
+                    self.items.popleft()
+                    self._dropped()
+                else:
+                    self._dropped()
+                    return True
+            if self.closed:
+                return False
+            self.items.append(item)
+            self.cond.notify_all()
+            return True
+
+    def _dropped(self):
+        self.dropped += 1
+        if self.drop_counter:
+            metrics.count(self.drop_counter)
+
+    def get(self):
+        """Next item, or None once the queue is closed"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.items or self.closed)
+            if self.closed:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.items.clear()
+            self.cond.notify_all()
+
+class ModePipeline:
+    """Runs a mode's stages over a frame source until a command arrives
+
+    With several streams in one process (src/multi_stream.py) each pipeline
+    gets its stream_id, which is added to its log prefix and window title,
+    and its own CommandBus to wait on instead of the global one.
+    """
+
+    def __init__(self, name, command, window, cap, stages, speech_running=False,
+                 commands=None, stream_id=None):
+        suffix = f" [{stream_id}]" if stream_id is not None else ""
+        self.name = name + suffix     # log prefix, e.g. "Navigation"
+        self.command = command        # the mode's own command, e.g. "nav"
+        self.window = window + suffix
+        self.commands = commands if commands is not None else command_bus
+        self.cap = cap
+        self.stages = stages
+        self.speech_running = speech_running
+        # Offline sources never drop frames
+        lossless = getattr(cap, "realtime", True) is False
+        self.queues = [StageQueue(stage.queue_size, BLOCK if lossless else stage.policy,
+                                  f"{command}.dropped.{stage.name}")
+                       for stage in stages]
+        self.threads = []
+        self.finished = threading.Event()  # the source ran out and every frame went through
+        self.stopping = False
+        self.frames_read = 0
+
+    def print_shortcuts(self):
+        """Print the window/typed shortcuts that leave this mode"""
+        names = {"exit": "Return to main menu", "nav": "Switch to navigation mode",
+                 "cap": "Switch to captioning mode", "sign": "Switch to sign detection mode",
+                 "curr": "Switch to currency detection mode", "voice": "Toggle voice commands"}
+        print("\nKeyboard shortcuts:")
+        for key, command in SHORTCUTS.items():
+            if command != self.command:
+                print(f"  {key} - {names[command]}")
+
+    def _capture(self):
+        while not self.stopping:
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            metrics.observe(f"{self.command}.capture", time.perf_counter() - start)
+            if not ret:
+                if getattr(self.cap, "finished", False):
+                    print(f"[{self.name}] Frame source finished.")
+                    self.queues[0].put(_END)
+                    return
+                print(f"[{self.name}] Camera frame acquisition failed.")
+                continue
+            if not self.queues[0].put(FrameContext(frame, self.frames_read)):
+                return
+            self.frames_read += 1
+
+    def _run_stage(self, position):
+        stage = self.stages[position]
+        inbox = self.queues[position]
+        outbox = self.queues[position + 1] if position + 1 < len(self.stages) else None
+        draw = not display.headless
+        while True:
+            ctx = inbox.get()
+            if ctx is None:
+                return
+            if ctx is _END:
+                if outbox is not None:
+                    outbox.put(_END)
+                else:
+                    self.finished.set()
+                return
+
+            if draw or not stage.draw_only:
+                start = time.perf_counter()
+                try:
+                    keep = stage.func(ctx) is not False
+                except Exception as e:
+                    print(f"[{self.name}] Error in {stage.name}: {e}")
+                    keep = False
+                elapsed = time.perf_counter() - start
+                metrics.observe(f"{self.command}.{stage.name}", elapsed)
+                stage.seconds += elapsed
+                stage.processed += 1
+                if not keep:
+                    continue
+
+            if outbox is not None:
+                if not outbox.put(ctx):
+                    return
+                continue
+
+            # The last stage hands the frame to the display thread
+            if draw:
+                with metrics.timer(f"{self.command}.overlay"):
+                    add_controls_overlay(ctx.frame, self.speech_running)
+            display.show(self.window, ctx.frame)
+            metrics.count(f"{self.command}.frames")
+            metrics.observe(f"{self.command}.frame_latency", time.time() - ctx.captured_at)
+
+    def start(self):
+        """Start the capture and stage threads"""
+        display.begin(self.window)
+        self.threads = [threading.Thread(target=self._capture, daemon=True,
+                                         name=f"{self.command}-capture")]
+        self.threads += [threading.Thread(target=self._run_stage, args=(i,), daemon=True,
+                                          name=f"{self.command}-{stage.name}")
+                         for i, stage in enumerate(self.stages)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Stop every thread; frames still queued are discarded"""
+        self.stopping = True
+        for q in self.queues:
+            q.close()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+
+    def run(self, speak_callback):
+        """Run until a command arrives or the source is finished, and return the command"""
+        self.print_shortcuts()
+        # Keys pressed and lines typed before the mode started are not meant for it
+        self.commands.clear()
+        self.start()
+        next_mode = None
+        try:
+            # Window keys (from the display thread), typed and voice commands all arrive on the command bus
+            while next_mode is None:
+                next_mode = self.commands.wait(timeout=0.05)
+                if next_mode is None and self.finished.is_set():
+                    next_mode = "exit"
+                    break
+                if next_mode is not None and next_mode not in COMMANDS:
+                    print(f"[{self.name}] Unknown command '{next_mode}'. Use {', '.join(COMMANDS)}.")
+                    next_mode = None
+                    continue
+                if next_mode == self.command:
+                    # Restarting would only reload the models; confirm the mode instead
+                    print(f"Already in {self.command} mode.")
+                    speak_callback(f"Already in {self.command} mode.")
+                    next_mode = None
+                    continue
+                if next_mode:
+                    if next_mode != "exit":
+                        print(f"Switching to {next_mode} mode.")
+                        speak_callback(f"Switching to {next_mode} mode.")
+                    else:
+                        print("Returning to main menu.")
+                        speak_callback("Returning to main menu.")
+        finally:
+            self.stop()
+            display.close_windows(self.window)
+            print(f"[{self.name}] {display.summary(self.window)}.")
+            print(f"[{self.name}] {self.summary()}.")
+        return next_mode
+
+    def summary(self):
+        """Mean time per frame in each stage, and frames dropped by full queues"""
+        parts = [f"{stage.name} {1000 * stage.seconds / stage.processed:.1f} ms"
+                 for stage in self.stages if stage.processed]
+        dropped = sum(q.dropped for q in self.queues)
+        return f"Stages: {', '.join(parts) or 'no frames'}; {dropped} frames dropped between stages"
@@ -0,0 +1,167 @@
+import numpy as np
+
+# Lightweight IoU/centroid multi-object tracker. Detections from keyframes
+# are matched to existing tracks so objects keep stable IDs; between
+# keyframes tracks are extrapolated with a constant-velocity model so the
+# detector does not have to run on every frame. Tracks need min_hits
+# matches before they are confirmed ("born") and survive max_misses missed
+# keyframes before they "die", which stops one-frame misses from flickering
+# announcements.
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(1, -1, 4)
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+class Track:
+    """A tracked object with a stable ID"""
+
+    def __init__(self, track_id, box, conf, cls_id, frame_index):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # box change per frame
+        self.conf = float(conf)
+        self.cls_id = int(cls_id)
+        self.hits = 1
+        self.misses = 0
+        self.confirmed = False
+        self.last_frame = frame_index
+
+class ObjectTracker:
+    """Assign stable IDs to detections and extrapolate them between keyframes"""
+
+    def __init__(self, iou_threshold=0.3, max_center_distance=0.5, min_hits=2, max_misses=3):
+        self.iou_threshold = iou_threshold
+        # Centroid fallback: max distance as a fraction of the track's box diagonal
+        self.max_center_distance = max_center_distance
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+        self.frame_index = 0
+
+    def predict(self):
+        """Advance one frame without detections, extrapolating every track"""
+        self.frame_index += 1
+        for track in self.tracks:
+            track.box = track.box + track.velocity
+        return self.active_tracks()
+
+    def update(self, boxes, confs, cls_ids):
+        """Advance one frame using detector output
+
+        Returns (born, died): tracks confirmed on this frame and confirmed
+        tracks that were dropped after too many missed keyframes.
+        """
+        self.frame_index += 1
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        matches, unmatched_tracks, unmatched_dets = self._match(boxes, cls_ids)
+
+        born = []
+        for t_idx, d_idx in matches:
+            track = self.tracks[t_idx]
+            elapsed = max(1, self.frame_index - track.last_frame)
+            # Velocity from the last matched position, not the extrapolated one
+            previous = track.box - track.velocity * (self.frame_index - 1 - track.last_frame)
+            # Smooth the velocity so one noisy box does not send the track flying
+            track.velocity = 0.5 * track.velocity + 0.5 * (boxes[d_idx] - previous) / elapsed
+            track.box = boxes[d_idx]
+            track.conf = float(confs[d_idx])
+            track.hits += 1
+            track.misses = 0
+            track.last_frame = self.frame_index
+            if not track.confirmed and track.hits >= self.min_hits:
+                track.confirmed = True
+                born.append(track)
+
+        died = []
+        for t_idx in unmatched_tracks:
+            track = self.tracks[t_idx]
+            track.misses += 1
+            track.box = track.box + track.velocity
+        survivors = []
+        for track in self.tracks:
+            if track.misses > self.max_misses or (not track.confirmed and track.misses > 0):
+                if track.confirmed:
+                    died.append(track)
+            else:
+                survivors.append(track)
+        self.tracks = survivors
+
+        for d_idx in unmatched_dets:
+            track = Track(self.next_id, boxes[d_idx], confs[d_idx], cls_ids[d_idx], self.frame_index)
+            self.next_id += 1
+            if self.min_hits <= 1:
+                track.confirmed = True
+                born.append(track)
+            self.tracks.append(track)
+
+        return born, died
+
+    def _match(self, boxes, cls_ids):
+        """Greedy IoU matching within each class, with a centroid-distance fallback"""
+        if not self.tracks or len(boxes) == 0:
+            return [], list(range(len(self.tracks))), list(range(len(boxes)))
+
+        track_boxes = np.stack([t.box for t in self.tracks])
+        track_cls = np.array([t.cls_id for t in self.tracks])
+        same_class = track_cls[:, None] == np.asarray(cls_ids)[None, :]
+
+        scores = np.where(same_class, iou_matrix(track_boxes, boxes), 0.0)
+        valid = scores >= self.iou_threshold
+
+        # Boxes that moved too far to overlap can still match on centroid distance
+        track_centers = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+        det_centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        dist = np.linalg.norm(track_centers[:, None, :] - det_centers[None, :, :], axis=2)
+        diag = np.linalg.norm(track_boxes[:, 2:] - track_boxes[:, :2], axis=1)[:, None]
+        near = same_class & ~valid & (dist <= self.max_center_distance * np.maximum(diag, 1))
+        # Rank centroid matches below any IoU match
+        scores = np.where(near, self.iou_threshold * (1 - dist / np.maximum(diag, 1)) * 0.5, scores)
+        valid |= near
+        scores = np.where(valid, scores, -1.0)
+
+        matches = []
+        used_tracks, used_dets = set(), set()
+        for flat in np.argsort(-scores, axis=None):
+            t_idx, d_idx = np.unravel_index(flat, scores.shape)
+            if scores[t_idx, d_idx] < 0:
+                break
+            if t_idx in used_tracks or d_idx in used_dets:
+                continue
+            matches.append((int(t_idx), int(d_idx)))
+            used_tracks.add(t_idx)
+            used_dets.add(d_idx)
+
+        unmatched_tracks = [i for i in range(len(self.tracks)) if i not in used_tracks]
+        unmatched_dets = [i for i in range(len(boxes)) if i not in used_dets]
+        return matches, unmatched_tracks, unmatched_dets
+
+    def active_tracks(self):
+        """Confirmed tracks, including ones briefly missed by the detector"""
+        return [t for t in self.tracks if t.confirmed]
+
+    def has_tentative(self):
+        """True while a track still needs detections before it is confirmed"""
+        return any(not t.confirmed for t in self.tracks)
+
+    def active_arrays(self):
+        """Confirmed tracks as (boxes, confs, cls_ids, ids) arrays"""
+        tracks = self.active_tracks()
+        if not tracks:
+            return (np.zeros((0, 4), dtype=int), np.zeros(0, dtype=np.float32),
+                    np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        return (np.stack([t.box for t in tracks]).round().astype(int),
+                np.array([t.conf for t in tracks], dtype=np.float32),
+                np.array([t.cls_id for t in tracks], dtype=int),
+                np.array([t.id for t in tracks], dtype=int))
+
+    def reset(self):
+        """Forget all tracks"""
+        self.tracks = []
@@ -1,39 +1,101 @@
+from collections import OrderedDict
+
 import cv2
+import numpy as np
+
+from .command_bus import key_command
+
+OVERLAY_HEIGHT = 70
+OVERLAY_DIM = 0.3  # the controls strip keeps 30% of the frame underneath it
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Rendered controls strips keyed by (width, height, voice status), and
+# rendered status texts keyed by their text, position, style and frame size. Text is rendered once
+# into the sparse pixels it covers (with their anti-aliasing coverage), so a
+# frame only dims its bottom strip and blends those pixels, instead of
+# copying and blending the whole frame and rasterizing the text again.
+_overlay_cache = {}
+_text_cache = OrderedDict()
+TEXT_CACHE_SIZE = 64
+
+def _render_sprite(shape, lines):
+    """Render (text, org, scale, color, thickness) lines into (ys, xs, keep, add)
+
+    A pixel channel is blended as value * keep + add, i.e. drawn with its
+    anti-aliasing coverage.
+    """
+    ys, xs, keep, add = [], [], [], []
+    for text, org, scale, color, thickness in lines:
+        mask = np.zeros(shape, dtype=np.uint8)
+        cv2.putText(mask, text, org, FONT, scale, 255, thickness)
+        y, x = np.nonzero(mask)
+        alpha = (mask[y, x].astype(np.float32) / 255.0)[:, None]
+        ys.append(y)
+        xs.append(x)
+        keep.append(np.repeat(1.0 - alpha, 3, axis=1))
+        add.append(alpha * np.asarray(color, dtype=np.float32) + 0.5)  # + 0.5 rounds on truncation
+    return np.concatenate(ys), np.concatenate(xs), np.concatenate(keep), np.concatenate(add)
+
+def _flatten(ys, xs, keep, add, width):
+    """Turn sprite pixels into flat channel indices into a (h, width, 3) image"""
+    index = ((ys * width + xs) * 3)[:, None] + np.arange(3)
+    return index.ravel(), keep.ravel(), add.ravel()
+
+def _blend(region, index, keep, add):
+    """Blend rendered text pixels into region in place"""
+    flat = region.reshape(-1)  # a view unless region is a non-contiguous slice
+    flat[index] = flat[index] * keep + add
+    if not np.shares_memory(flat, region):
+        region[...] = flat.reshape(region.shape)
 
 def add_controls_overlay(frame, speech_running=False):
-    """Add control information overlay to frame"""
+    """Add control information overlay to frame (drawn in place)"""
     h, w = frame.shape[:2]
-    
-    # Create overlay for controls at bottom of frame
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (0, h-70), (w, h), (0, 0, 0), -1)
-    cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
-    
-    # Add text for controls
-    cv2.putText(frame, "Controls: q=exit, n=nav, c=cap, s=sign, m=curr, v=voice", 
-               (10, h-45), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-    
-    # Add voice command status
-    status = "ON" if speech_running else "OFF"
-    cv2.putText(frame, f"Voice commands: {status}", 
-               (10, h-20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 
-               (0, 255, 0) if speech_running else (0, 0, 255), 1)
-    
+    strip_height = min(OVERLAY_HEIGHT, h)
+
+    key = (w, h, bool(speech_running))
+    sprite = _overlay_cache.get(key)
+    if sprite is None:
+        # Text rows are relative to the strip (frame row h-70 is strip row 0)
+        top = h - strip_height
+        status = "ON" if speech_running else "OFF"
+        sprite = _flatten(*_render_sprite((strip_height, w), [
+            ("Controls: q=exit, n=nav, c=cap, s=sign, m=curr, v=voice",
+             (10, h - 45 - top), 0.5, (255, 255, 255), 1),
+            (f"Voice commands: {status}",
+             (10, h - 20 - top), 0.5, (0, 255, 0) if speech_running else (0, 0, 255), 1),
+        ]), w)
+        _overlay_cache[key] = sprite
+
+    # Dim only the bottom strip, then blend the cached text into it
+    roi = frame[h - strip_height:h]
+    cv2.convertScaleAbs(roi, roi, OVERLAY_DIM)
+    _blend(roi, *sprite)
+
+    return frame
+
+def draw_status_text(frame, text, org, scale=0.7, color=(0, 0, 255), thickness=2):
+    """Draw a mode's status line like cv2.putText, reusing the rendered text"""
+    h, w = frame.shape[:2]
+    key = (text, tuple(org), scale, tuple(color), thickness, w, h)
+    sprite = _text_cache.get(key)
+    if sprite is None:
+        (text_w, text_h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        pad = thickness + 2
+        ys, xs, keep, add = _render_sprite((text_h + baseline + 2 * pad, text_w + 2 * pad),
+                                           [(text, (pad, text_h + pad), scale, color, thickness)])
+        # Move the text to org, dropping pixels outside the frame
+        ys, xs = ys + (org[1] - text_h - pad), xs + (org[0] - pad)
+        inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+        sprite = _text_cache[key] = _flatten(ys[inside], xs[inside], keep[inside], add[inside], w)
+        while len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+
+    _blend(frame, *sprite)
     return frame
 
 def handle_common_keys(key):
     """Handle common keyboard shortcuts for mode switching"""
-    if key == ord('q'):
-        return "exit"  # Exit to main menu
-    elif key == ord('n'):
-        return "nav"   # Navigation mode
-    elif key == ord('c'):
-        return "cap"   # Captioning mode
-    elif key == ord('s'):
-        return "sign"  # Sign detection mode
-    elif key == ord('m'):
-        return "curr"  # Currency detection mode
-    elif key == ord('v'):
-        # Toggle voice command mode (handled separately)
-        return "voice"
-    return None        # No mode change
\ No newline at end of file
+    return key_command(key)  # None means no mode change
@@ -0,0 +1,205 @@
+import glob
+import hashlib
+import os
+import shutil
+
+from .log import log
+
+# Selectable inference backend for the YOLO models:
+#   "torch"     - ultralytics PyTorch weights in eager mode (default)
+#   "onnx"      - exported once to ONNX and run through ONNX Runtime on CPU
+#   "onnx-int8" - the ONNX export with static INT8 quantization, calibrated on
+#                 saved frames from CALIBRATION_DIR
+# Exports are cached under models/.onnx_cache keyed by the weight file's hash,
+# so they are rebuilt only when the weights change. ultralytics runs ONNX
+# models through the same predictor, so results keep the usual
+# results.boxes layout the modes already post-process.
+# ultralytics (and with it torch), cv2 and numpy are imported inside the
+# functions that need them, so selecting a backend at startup stays cheap.
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
+CACHE_DIR = os.path.join(MODELS_DIR, ".onnx_cache")
+CALIBRATION_DIR = os.path.join(MODELS_DIR, "calibration")
+YOLO_BACKEND = os.environ.get("ASSISTANT_YOLO_BACKEND", "torch")
+BACKENDS = ("torch", "onnx", "onnx-int8")
+EXPORT_IMGSZ = 640
+
+def set_yolo_backend(backend):
+    """Select the backend used when load_yolo is called without one"""
+    global YOLO_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown YOLO backend '{backend}', expected one of {BACKENDS}")
+    YOLO_BACKEND = backend
+
+def get_yolo_backend():
+    """Return the currently selected default backend"""
+    return YOLO_BACKEND
+
+def file_hash(path, chunk_size=1 << 20):
+    """Short SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def cached_export_path(weights_path, suffix="", imgsz=EXPORT_IMGSZ):
+    """Path of the cached ONNX artifact for a weight file"""
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{file_hash(weights_path)}-{imgsz}{suffix}.onnx")
+
+def export_onnx(weights_path, imgsz=EXPORT_IMGSZ):
+    """Export YOLO weights to ONNX once and return the cached file path"""
+    target = cached_export_path(weights_path, imgsz=imgsz)
+    if os.path.exists(target):
+        return target
+
+    from ultralytics import YOLO
+
+    log(f"[YOLO Backend] Exporting {os.path.basename(weights_path)} to ONNX...")
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Dynamic axes keep batched calls from the inference scheduler working
+    exported = YOLO(weights_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+    shutil.move(str(exported), target)
+    return target
+
+def letterbox(frame, imgsz=EXPORT_IMGSZ):
+    """Resize and pad a BGR frame the way the ultralytics predictor does"""
+    import cv2
+    import numpy as np
+
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    resized = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - nh) // 2, (imgsz - nw) // 2
+    canvas[top:top + nh, left:left + nw] = resized
+    return canvas
+
+def calibration_frames(calibration_dir=CALIBRATION_DIR, limit=200):
+    """Paths of saved frames used to calibrate INT8 quantization"""
+    paths = []
+    for pattern in ("*.jpg", "*.jpeg", "*.png", "*.bmp"):
+        paths.extend(glob.glob(os.path.join(calibration_dir, pattern)))
+    return sorted(paths)[:limit]
+
+def calibration_key(paths):
+    """Short hash of a calibration set (names, sizes, mtimes); "weights" when empty"""
+    if not paths:
+        return "weights"
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+def int8_export_path(weights_path, calibration_dir=CALIBRATION_DIR, imgsz=EXPORT_IMGSZ):
+    """Path of the cached INT8 artifact; it changes with the calibration frames"""
+    key = calibration_key(calibration_frames(calibration_dir))
+    return cached_export_path(weights_path, suffix=f"-int8-{key}", imgsz=imgsz)
+
+def quantize_int8(weights_path, calibration_dir=CALIBRATION_DIR, imgsz=EXPORT_IMGSZ):
+    """Statically quantize the ONNX export to INT8 and return the cached file path
+
+    The cached file is keyed by the calibration set as well as the weights,
+    so saving new frames (or another calibration_dir) quantizes again.
+    """
+    target = int8_export_path(weights_path, calibration_dir, imgsz)
+    if os.path.exists(target):
+        return target
+
+    import cv2
+    import numpy as np
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    fp32_path = export_onnx(weights_path, imgsz)
+    paths = calibration_frames(calibration_dir)
+    if not paths:
+        raise FileNotFoundError(f"No calibration frames found in {calibration_dir}")
+
+    input_name = onnx.load(fp32_path, load_external_data=False).graph.input[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(paths)
+
+        def get_next(self):
+            for path in self.paths:
+                frame = cv2.imread(path)
+                if frame is None:
+                    continue
+                img = cv2.cvtColor(letterbox(frame, imgsz), cv2.COLOR_BGR2RGB)
+                img = img.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+                return {input_name: img}
+            return None
+
+    log(f"[YOLO Backend] Quantizing {os.path.basename(weights_path)} to INT8 "
+        f"with {len(paths)} calibration frames...")
+    quantize_static(fp32_path, target, FrameReader(),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    per_channel=True)
+
+    # Keep the class names and other export metadata ultralytics reads back
+    source = onnx.load(fp32_path, load_external_data=False)
+    quantized = onnx.load(target)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, target)
+    return target
+
+# (weights, backend, calibration dir) -> (backend actually used, file to load)
+_prepared = {}
+
+def prepare_yolo(weights_path, backend=None, calibration_dir=CALIBRATION_DIR):
+    """Return (backend, path): the artifact to load, or ("torch", weights_path) on failure
+
+    Exports are prepared (or found in the cache) once per process, so callers
+    can key and size a model by the backend it will actually run on before
+    loading it.
+    """
+    backend = backend or YOLO_BACKEND
+    if backend not in BACKENDS:
+        log(f"[YOLO Backend] Unknown backend '{backend}', using torch.")
+        backend = "torch"
+
+    key = (weights_path, backend, calibration_dir)
+    if key not in _prepared:
+        prepared = ("torch", weights_path)
+        try:
+            if backend == "onnx":
+                prepared = (backend, export_onnx(weights_path))
+            elif backend == "onnx-int8":
+                prepared = (backend, quantize_int8(weights_path, calibration_dir))
+        except ImportError as e:
+            log(f"[YOLO Backend] ONNX Runtime not available ({e}). Install with: pip install onnx onnxruntime")
+        except Exception as e:
+            log(f"[YOLO Backend] Could not prepare {backend} model: {e}. Using torch.")
+        _prepared[key] = prepared
+    return _prepared[key]
+
+def load_yolo(weights_path, backend=None, calibration_dir=CALIBRATION_DIR):
+    """Load a YOLO model with the selected backend, falling back to PyTorch on failure"""
+    from ultralytics import YOLO
+
+    backend, path = prepare_yolo(weights_path, backend, calibration_dir)
+    if backend == "torch":
+        return YOLO(path)
+    return YOLO(path, task="detect")
+
+def get_yolo_model(name, weights_path, backend=None):
+    """Load YOLO weights through the model cache
+
+    The cache key names the backend actually loaded (after any fallback to
+    torch). ONNX models are sized by their file: ultralytics wraps them in a
+    module without parameters, so they cannot be estimated from the model.
+    """
+    from .model_cache import get_model, raise_if_cancelled
+
+    # An export can take longer than the load itself; skip it for a cancelled preload
+    raise_if_cancelled()
+    backend, path = prepare_yolo(weights_path, backend)
+    size_bytes = os.path.getsize(path) if backend != "torch" else None
+    return get_model(f"{name}:{backend}", lambda: load_yolo(weights_path, backend),
+                     size_bytes=size_bytes)
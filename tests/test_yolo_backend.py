@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import yolo_backend
+
+def make_weights(tmp_path):
+    weights = tmp_path / "yolo.pt"
+    weights.write_bytes(b"weights")
+    return str(weights)
+
+def test_int8_path_changes_with_calibration_frames(tmp_path, monkeypatch):
+    monkeypatch.setattr(yolo_backend, "CACHE_DIR", str(tmp_path / "cache"))
+    weights = make_weights(tmp_path)
+    calibration = tmp_path / "calibration"
+    calibration.mkdir()
+
+    weight_only = yolo_backend.int8_export_path(weights, str(calibration))
+    (calibration / "frame_0.jpg").write_bytes(b"a")
+    one_frame = yolo_backend.int8_export_path(weights, str(calibration))
+    (calibration / "frame_1.jpg").write_bytes(b"bb")
+    two_frames = yolo_backend.int8_export_path(weights, str(calibration))
+
+    assert len({weight_only, one_frame, two_frames}) == 3
+    assert yolo_backend.int8_export_path(weights, str(calibration)) == two_frames
+
+def test_int8_path_depends_on_calibration_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(yolo_backend, "CACHE_DIR", str(tmp_path / "cache"))
+    weights = make_weights(tmp_path)
+    for name, content in (("a", b"1"), ("b", b"22")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "frame.jpg").write_bytes(content)
+
+    assert (yolo_backend.int8_export_path(weights, str(tmp_path / "a"))
+            != yolo_backend.int8_export_path(weights, str(tmp_path / "b")))